@@ -0,0 +1,269 @@
+import sqlite3
+import threading
+from collections.abc import Iterable
+from datetime import datetime
+from pathlib import Path
+from scrapy.exceptions import NotConfigured
+from _extractor import CAMPOS, CAMPOS_TARJETA
+from _utils import en_hilo
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS corridas (
+    id INTEGER PRIMARY KEY,
+    inicio TEXT NOT NULL UNIQUE,
+    fin TEXT,
+    items INTEGER NOT NULL DEFAULT 0,
+    eliminados INTEGER
+);
+CREATE TABLE IF NOT EXISTS funcionarios (
+    url TEXT PRIMARY KEY,
+    nombre TEXT,
+    institucion TEXT,
+    cargo TEXT,
+    fecha_inicio TEXT,
+    correo TEXT,
+    telefono TEXT,
+    resolucion TEXT,
+    resumen TEXT,
+    vigente INTEGER NOT NULL DEFAULT 1,
+    primera_corrida INTEGER REFERENCES corridas (id),
+    ultima_corrida INTEGER REFERENCES corridas (id)
+);
+CREATE TABLE IF NOT EXISTS historial (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    corrida INTEGER NOT NULL REFERENCES corridas (id),
+    desde TEXT NOT NULL,
+    cargo TEXT,
+    institucion TEXT,
+    vigente INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS historial_url ON historial (url, desde);
+CREATE INDEX IF NOT EXISTS historial_desde ON historial (desde);
+CREATE INDEX IF NOT EXISTS funcionarios_institucion ON funcionarios (institucion);
+"""
+
+
+def _trozos(valores: list, tamano: int = 500):
+    for i in range(0, len(valores), tamano):
+        yield valores[i : i + tamano]
+
+
+class BaseFuncionarios:
+    """
+    Base SQLite con el estado actual de cada funcionario (una fila por URL de perfil) y el
+    historial de sus cargos e instituciones.
+
+    Cada corrida queda registrada en `corridas` con su fecha de inicio. El historial guarda una
+    fila por funcionario solo cuando aparece, cambia de `cargo` o de `institucion`, o deja de
+    figurar en el directorio, con la fecha de la corrida en que se detectó (`desde`); así se
+    puede consultar el directorio en cualquier fecha sin conservar cada CSV completo.
+
+    La base usa WAL, de modo que se puede consultar mientras la crawl escribe, y los items se
+    guardan por lotes, cada uno en una sola transacción.
+    """
+
+    def __init__(self, ruta: str | Path):
+        Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(ruta), timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(_ESQUEMA)
+        self._lock = threading.RLock()
+        self.corrida: int | None = None
+        self.desde: str | None = None
+
+    def abrir_corrida(self, inicio: str | None = None) -> int:
+        """
+        Registra la corrida que empieza en `inicio` (ISO 8601; por defecto, ahora) y la usa en
+        las escrituras siguientes. Varios procesos con el mismo `inicio` comparten la corrida.
+        """
+        self.desde = inicio or datetime.now().isoformat(timespec="seconds")
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO corridas (inicio) VALUES (?)", (self.desde,))
+            (self.corrida,) = self.conn.execute(
+                "SELECT id FROM corridas WHERE inicio = ?", (self.desde,)
+            ).fetchone()
+        return self.corrida
+
+    def guardar_lote(self, items: list[dict], campos: tuple[str, ...] = CAMPOS) -> int:
+        """
+        Inserta o actualiza los items (por `url`) en una sola transacción y agrega al historial
+        los que son nuevos o cambiaron de cargo o institución. Solo se escriben las columnas de
+        `campos` (p. ej. las de la tarjeta del listado, sin borrar el resto). Devuelve el número
+        de cambios registrados en el historial.
+        """
+        columnas = [c for c in campos if c != "url"]
+        insertar = ", ".join(columnas)
+        actualizar = ", ".join(f"{c} = excluded.{c}" for c in columnas)
+        sql = f"""
+            INSERT INTO funcionarios (url, {insertar}, vigente, primera_corrida, ultima_corrida)
+            VALUES (?, {", ".join("?" * len(columnas))}, 1, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                {actualizar}, vigente = 1, ultima_corrida = excluded.ultima_corrida
+        """
+        with self._lock, self.conn:
+            previos = {}
+            urls = [item["url"] for item in items]
+            for trozo in _trozos(urls):
+                previos.update(
+                    (url, (cargo, institucion, vigente))
+                    for url, cargo, institucion, vigente in self.conn.execute(
+                        f"SELECT url, cargo, institucion, vigente FROM funcionarios "
+                        f"WHERE url IN ({', '.join('?' * len(trozo))})",
+                        trozo,
+                    )
+                )
+            cambios = []
+            for item in items:
+                actual = (item.get("cargo"), item.get("institucion"), 1)
+                if previos.get(item["url"]) != actual:
+                    cambios.append((item["url"], self.corrida, self.desde, *actual))
+            self.conn.executemany(
+                sql,
+                (
+                    (item["url"], *(item.get(c) for c in columnas), self.corrida, self.corrida)
+                    for item in items
+                ),
+            )
+            self.conn.executemany(
+                "INSERT INTO historial (url, corrida, desde, cargo, institucion, vigente) VALUES (?, ?, ?, ?, ?, ?)",
+                cambios,
+            )
+            self.conn.execute("UPDATE corridas SET items = items + ? WHERE id = ?", (len(items), self.corrida))
+        return len(cambios)
+
+    def marcar_eliminados(self, instituciones: list[str] | None = None, listados: Iterable[str] = ()) -> int:
+        """
+        Marca como no vigentes los funcionarios que no aparecieron en la corrida actual (solo
+        entre los de `instituciones`, si se indican) y lo registra en el historial. Los URLs de
+        `listados` figuraron en el listado aunque su item no se haya guardado (perfil fallido o
+        exportado en un intento anterior de la corrida), así que nunca cuentan como eliminados.
+        """
+        condicion = (
+            "vigente = 1 AND (ultima_corrida IS NULL OR ultima_corrida != ?)"
+            " AND url NOT IN (SELECT url FROM temp.listados)"
+        )
+        parametros: list = [self.corrida]
+        if instituciones:
+            condicion += " AND (" + " OR ".join("url LIKE ?" for _ in instituciones) + ")"
+            parametros += [f"%/institucion/{slug}/funcionarios/%" for slug in instituciones]
+        with self._lock, self.conn:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS listados (url TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM temp.listados")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO temp.listados (url) VALUES (?)", ((url,) for url in listados)
+            )
+            self.conn.execute(
+                f"""
+                INSERT INTO historial (url, corrida, desde, cargo, institucion, vigente)
+                SELECT url, ?, ?, NULL, NULL, 0 FROM funcionarios WHERE {condicion}
+                """,
+                [self.corrida, self.desde, *parametros],
+            )
+            eliminados = self.conn.execute(
+                f"UPDATE funcionarios SET vigente = 0 WHERE {condicion}", parametros
+            ).rowcount
+            self.conn.execute("UPDATE corridas SET eliminados = ? WHERE id = ?", (eliminados, self.corrida))
+        return eliminados
+
+    def cerrar_corrida(self):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE corridas SET fin = ? WHERE id = ?",
+                (datetime.now().isoformat(timespec="seconds"), self.corrida),
+            )
+
+    def en_fecha(self, fecha: str, institucion: str | None = None) -> list[dict]:
+        """
+        Funcionarios vigentes en `fecha` (ISO 8601, p. ej. "2025-03-01") según las corridas
+        hechas hasta ese momento, con el cargo y la institución que tenían entonces.
+        """
+        # Una fecha sin hora incluye las corridas de todo ese día
+        limite = fecha if "T" in fecha else f"{fecha}T23:59:59"
+        sql = """
+            SELECT h.url, f.nombre, h.cargo, h.institucion, h.desde FROM historial h
+            JOIN (SELECT url, MAX(id) AS id FROM historial WHERE desde <= ? GROUP BY url) u ON u.id = h.id
+            LEFT JOIN funcionarios f ON f.url = h.url
+            WHERE h.vigente = 1
+        """
+        parametros = [limite]
+        if institucion is not None:
+            sql += " AND h.institucion = ?"
+            parametros.append(institucion)
+        with self._lock:
+            filas = self.conn.execute(sql + " ORDER BY h.url", parametros).fetchall()
+        return [dict(zip(("url", "nombre", "cargo", "institucion", "desde"), fila)) for fila in filas]
+
+    def historial(self, url: str) -> list[dict]:
+        """Cargos e instituciones de un funcionario a lo largo de las corridas."""
+        with self._lock:
+            filas = self.conn.execute(
+                "SELECT desde, cargo, institucion, vigente FROM historial WHERE url = ? ORDER BY id", (url,)
+            ).fetchall()
+        return [dict(zip(("desde", "cargo", "institucion", "vigente"), fila)) for fila in filas]
+
+    def cerrar(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+
+class SQLitePipeline:
+    """
+    Escribe los items directamente en la base SQLite de `SQLITE_PATH` (ver `BaseFuncionarios`),
+    en lotes de `SQLITE_LOTE` items.
+
+    Cada lote se guarda en un hilo aparte mientras la crawl sigue descargando, así que la
+    carga en la base se solapa con la crawl en lugar de hacerse después con el CSV.
+    """
+    def __init__(self, ruta: str | Path, lote: int = 2000, inicio: str | None = None, particionada: bool = False):
+        self.ruta = ruta
+        self.lote = max(1, lote)
+        self.inicio = inicio
+        self.particionada = particionada
+        self.base = None
+        self.pendientes: list[dict] = []
+        self.campos = CAMPOS
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        ruta = crawler.settings.get("SQLITE_PATH")
+        if not ruta:
+            raise NotConfigured
+        return cls(
+            ruta,
+            crawler.settings.getint("SQLITE_LOTE", 2000),
+            crawler.settings.get("SQLITE_CORRIDA"),
+            crawler.settings.getint("PARTICION_TOTAL", 1) > 1,
+        )
+
+    def open_spider(self, spider):
+        self.base = BaseFuncionarios(self.ruta)
+        self.base.abrir_corrida(self.inicio)
+        # Con `detalle="ninguno"` los items solo traen los campos de la tarjeta: el resto de
+        # columnas conserva lo que se guardó al visitar el perfil
+        if getattr(spider, "detalle", "todos") == "ninguno":
+            self.campos = CAMPOS_TARJETA + ("url",)
+
+    async def process_item(self, item, spider):
+        self.pendientes.append(dict(item))
+        if len(self.pendientes) >= self.lote:
+            lote, self.pendientes = self.pendientes, []
+            cambios = await en_hilo(self.base.guardar_lote, lote, self.campos)
+            spider.crawler.stats.inc_value("sqlite/cambios", cambios)
+        return item
+
+    def close_spider(self, spider):
+        if self.pendientes:
+            cambios = self.base.guardar_lote(self.pendientes, self.campos)
+            spider.crawler.stats.inc_value("sqlite/cambios", cambios)
+            self.pendientes = []
+        # Como en el modo incremental, solo se marcan eliminados si se recorrió todo el listado;
+        # con particiones por hojas, cada proceso ve solo una parte
+        if spider.listado_completo and not self.particionada:
+            listados = spider.perfiles_descubiertos | spider.perfiles_completados | spider.por_reintentar
+            eliminados = self.base.marcar_eliminados(spider.instituciones, listados)
+            spider.crawler.stats.set_value("sqlite/eliminados", eliminados)
+        self.base.cerrar_corrida()
+        self.base.cerrar()
@@ -0,0 +1,187 @@
+import logging
+import sqlite3
+import zlib
+from pathlib import Path
+from time import time
+from scrapy.extensions.httpcache import RFC2616Policy
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+from w3lib.http import headers_dict_to_raw, headers_raw_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+class RevalidacionPolicy(RFC2616Policy):
+    """
+    Política de caché para desarrollo: una respuesta se considera fresca durante
+    `HTTPCACHE_FRESCURA_SECS` (aunque el sitio envíe `max-age=0`), y después se revalida con
+    `If-None-Match`/`If-Modified-Since` en lugar de descargarse de nuevo. Un 304 reutiliza la
+    respuesta guardada; un 5xx también, salvo que la respuesta guardada exija `must-revalidate`.
+
+    Solo se guardan respuestas exitosas, para no repetir errores del sitio en la siguiente corrida.
+    """
+    ESTADOS_CACHEABLES = (200, 203, 300, 301, 308)
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.frescura = settings.getint("HTTPCACHE_FRESCURA_SECS", 86400)
+
+    def should_cache_response(self, response, request) -> bool:
+        if response.status not in self.ESTADOS_CACHEABLES:
+            return False
+        return b"no-store" not in self._parse_cachecontrol(response)
+
+    def _compute_freshness_lifetime(self, response, request, now) -> float:
+        return max(self.frescura, super()._compute_freshness_lifetime(response, request, now))
+
+
+class CacheCompactaStorage:
+    """
+    Almacenamiento de la caché HTTP en un único archivo SQLite indexado por fingerprint, con
+    cuerpos y cabeceras comprimidos con zlib (en lugar de varios archivos por URL).
+
+    Al abrir y cerrar la spider se eliminan las entradas con más de `HTTPCACHE_MAX_EDAD_SECS`
+    y, si el archivo supera `HTTPCACHE_MAX_MB`, las más antiguas hasta bajar del límite.
+
+    Las escrituras se confirman cada `HTTPCACHE_COMMIT_CADA` respuestas o cada
+    `HTTPCACHE_COMMIT_SECS` segundos, lo que ocurra primero, para no retener el lock de
+    escritura frente a otros procesos que usan la misma caché; estos esperan hasta
+    `HTTPCACHE_ESPERA_SECS` a que se libere. Si aun así no se puede abrir la caché, la crawl
+    sigue sin ella.
+    """
+
+    def __init__(self, settings):
+        self.cachedir = data_path(settings["HTTPCACHE_DIR"], createdir=True)
+        self.expiration_secs = settings.getint("HTTPCACHE_EXPIRATION_SECS")
+        self.max_edad = settings.getint("HTTPCACHE_MAX_EDAD_SECS", 0)
+        self.max_bytes = settings.getfloat("HTTPCACHE_MAX_MB", 0) * 1024 * 1024
+        self.commit_cada = settings.getint("HTTPCACHE_COMMIT_CADA", 20)
+        self.commit_secs = settings.getfloat("HTTPCACHE_COMMIT_SECS", 1.0)
+        self.espera = settings.getfloat("HTTPCACHE_ESPERA_SECS", 60)
+        self.archivo = settings.get("HTTPCACHE_ARCHIVO")
+        self.conn = None
+        self._pendientes = 0
+        self._ultimo_commit = time()
+
+    def open_spider(self, spider):
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        ruta = Path(self.cachedir, self.archivo or f"{spider.name}.sqlite3")
+        try:
+            self.conn = sqlite3.connect(str(ruta), timeout=self.espera)
+            # auto_vacuum solo tiene efecto si se define antes de crear las tablas
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            with self.conn:
+                self.conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS respuestas (
+                        clave TEXT PRIMARY KEY,
+                        url TEXT NOT NULL,
+                        status INTEGER NOT NULL,
+                        headers BLOB NOT NULL,
+                        body BLOB NOT NULL,
+                        tamano INTEGER NOT NULL,
+                        guardado REAL NOT NULL
+                    )
+                    """
+                )
+                self.conn.execute("CREATE INDEX IF NOT EXISTS respuestas_guardado ON respuestas (guardado)")
+            self.desalojar()
+        except sqlite3.OperationalError as e:
+            logger.error(
+                f"No se pudo abrir la caché HTTP {ruta} ({e}); se continúa sin caché", extra={"spider": spider}
+            )
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = None
+            return
+        logger.debug(f"Caché HTTP compacta en {ruta}", extra={"spider": spider})
+
+    def close_spider(self, spider):
+        if self.conn is None:
+            return
+        self.conn.commit()
+        try:
+            self.desalojar()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"No se pudo desalojar la caché HTTP: {e}", extra={"spider": spider})
+        self.conn.close()
+
+    def retrieve_response(self, spider, request):
+        if self.conn is None:
+            return None
+        # Entre dos respuestas guardadas puede pasar mucho tiempo: no retener el lock mientras tanto
+        self._confirmar()
+        fila = self.conn.execute(
+            "SELECT url, status, headers, body, guardado FROM respuestas WHERE clave = ?",
+            (self._clave(request),),
+        ).fetchone()
+        if fila is None:
+            return None
+        url, status, headers, body, guardado = fila
+        if 0 < self.expiration_secs < time() - guardado:
+            return None
+        headers = Headers(headers_raw_to_dict(zlib.decompress(headers)))
+        body = zlib.decompress(body)
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=status, body=body)
+
+    def store_response(self, spider, request, response):
+        if self.conn is None:
+            return
+        headers = zlib.compress(headers_dict_to_raw(response.headers))
+        body = zlib.compress(response.body)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                self._clave(request),
+                response.url,
+                response.status,
+                headers,
+                body,
+                len(headers) + len(body),
+                time(),
+            ),
+        )
+        self._pendientes += 1
+        self._confirmar()
+
+    def _confirmar(self):
+        """Confirma la transacción abierta si ya acumuló suficientes respuestas o tiempo."""
+        if not self._pendientes:
+            self._ultimo_commit = time()
+        elif self._pendientes >= self.commit_cada or time() - self._ultimo_commit >= self.commit_secs:
+            self.conn.commit()
+            self._pendientes = 0
+            self._ultimo_commit = time()
+
+    def desalojar(self):
+        """Elimina las entradas vencidas y, si hace falta, las más antiguas hasta cumplir el tamaño."""
+        eliminadas = 0
+        if self.max_edad > 0:
+            eliminadas += self.conn.execute(
+                "DELETE FROM respuestas WHERE guardado < ?", (time() - self.max_edad,)
+            ).rowcount
+        if self.max_bytes > 0:
+            total = self.conn.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+            if total > self.max_bytes:
+                acumulado, limite = 0, None
+                for tamano, guardado in self.conn.execute(
+                    "SELECT tamano, guardado FROM respuestas ORDER BY guardado"
+                ):
+                    acumulado += tamano
+                    if total - acumulado <= self.max_bytes:
+                        limite = guardado
+                        break
+                eliminadas += self.conn.execute(
+                    "DELETE FROM respuestas WHERE guardado <= ?", (limite,)
+                ).rowcount
+        if eliminadas:
+            self.conn.commit()
+            self.conn.execute("PRAGMA incremental_vacuum")
+            logger.info(f"🧹 Caché HTTP: {eliminadas} respuestas desalojadas")
+
+    def _clave(self, request) -> str:
+        return self._fingerprinter.fingerprint(request).hex()
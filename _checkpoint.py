@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+import os
+from pathlib import Path
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+
+def leer_checkpoint(ruta: str | Path) -> dict | None:
+    """Lee el último checkpoint guardado, o None si no existe."""
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return None
+    return json.loads(ruta.read_text(encoding="utf-8"))
+
+
+def guardar_checkpoint(ruta: str | Path, estado: dict):
+    """Escribe el checkpoint de forma atómica (archivo temporal + reemplazo)."""
+    ruta = Path(ruta)
+    temporal = ruta.with_suffix(ruta.suffix + ".tmp")
+    temporal.write_text(json.dumps(estado, ensure_ascii=False), encoding="utf-8")
+    os.replace(temporal, ruta)
+
+
+def leer_partes(partes: list[Path], delimiter: str = ";") -> tuple[list[str], list[list[str]]]:
+    """
+    Lee las salidas parciales en CSV y devuelve la cabecera y las filas completas.
+
+    Una corrida interrumpida puede dejar la última fila a medio escribir: se descarta todo lo
+    que viene después del último fin de línea y las filas con un número de campos distinto.
+    """
+    cabecera: list[str] = []
+    filas: list[list[str]] = []
+    for parte in partes:
+        texto = parte.read_bytes().decode("utf-8-sig", errors="ignore")
+        texto = texto[: texto.rfind("\r\n") + 2] if "\r\n" in texto else ""
+        lector = csv.reader(io.StringIO(texto, newline=""), delimiter=delimiter)
+        cabecera_parte = next(lector, None)
+        if cabecera_parte is None:
+            continue
+        cabecera = cabecera or cabecera_parte
+        filas.extend(fila for fila in lector if len(fila) == len(cabecera_parte))
+    return cabecera, filas
+
+
+def fusionar_partes(partes: list[Path], destino: str | Path, delimiter: str = ";", ordenar: bool = False) -> int:
+    """
+    Une las salidas parciales en `destino`, sin URLs repetidas y en el orden original (o
+    ordenadas por `url` si `ordenar`). Devuelve el número de filas escritas.
+    """
+    cabecera, filas = leer_partes(partes, delimiter)
+    indice_url = cabecera.index("url") if "url" in cabecera else None
+    if ordenar and indice_url is not None:
+        filas.sort(key=lambda fila: fila[indice_url])
+    escritas = 0
+    vistos = set()
+    with open(destino, "w", encoding="utf-8-sig", newline="") as archivo:
+        escritor = csv.writer(archivo, delimiter=delimiter)
+        if cabecera:
+            escritor.writerow(cabecera)
+        for fila in filas:
+            if indice_url is not None:
+                if fila[indice_url] in vistos:
+                    continue
+                vistos.add(fila[indice_url])
+            escritor.writerow(fila)
+            escritas += 1
+    return escritas
+
+
+class CheckpointExtension:
+    """
+    Guarda periódicamente el estado de la crawl (hojas completadas y perfiles descubiertos)
+    para poder reanudarla con `main_scrapy(resume=True)` tras una interrupción.
+
+    Los perfiles ya terminados no se guardan aquí: se leen de las salidas parciales, que son
+    la única fuente confiable de lo que realmente llegó a disco.
+    """
+
+    def __init__(self, ruta: str | Path, intervalo: float):
+        self.ruta = Path(ruta)
+        self.intervalo = intervalo
+        self.tarea = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        ruta = crawler.settings.get("CHECKPOINT_PATH")
+        if not ruta:
+            raise NotConfigured
+        ext = cls(ruta, crawler.settings.getfloat("CHECKPOINT_INTERVALO", 60))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.tarea = task.LoopingCall(self.guardar, spider)
+        self.tarea.start(self.intervalo, now=False)
+
+    def spider_closed(self, spider, reason):
+        if self.tarea is not None and self.tarea.running:
+            self.tarea.stop()
+        self.guardar(spider, terminado=reason == "finished")
+
+    def guardar(self, spider, terminado: bool = False):
+        if getattr(spider, "fronteras", None) is None:
+            return
+        guardar_checkpoint(self.ruta, {**spider.estado_checkpoint(), "terminado": terminado})
+        spider.logger.debug(f"💾 Checkpoint guardado en {self.ruta}")
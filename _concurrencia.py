@@ -0,0 +1,137 @@
+import logging
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+from _fallidos import SLOT_FALLIDOS
+
+logger = logging.getLogger(__name__)
+
+
+def _mediana(valores: list[float]) -> float:
+    valores = sorted(valores)
+    return valores[len(valores) // 2]
+
+
+class ConcurrenciaAdaptativa:
+    """
+    Ajusta en caliente el número de solicitudes en vuelo según la salud del sitio.
+
+    Cada `ADAPTATIVA_INTERVALO` segundos mira la ventana anterior: si la tasa de errores
+    (timeouts, errores de conexión, 429 y 5xx) supera `ADAPTATIVA_ERROR_MAX` o llega un 429,
+    reduce la concurrencia a la mitad; si la latencia mediana supera `ADAPTATIVA_FACTOR_LATENCIA`
+    veces la latencia de referencia, la reduce un 25 %; si el sitio responde bien y hay
+    solicitudes esperando, la sube en `ADAPTATIVA_PASO`. Siempre dentro de
+    [`ADAPTATIVA_MIN`, `ADAPTATIVA_MAX`]. Cada decisión se registra en el log.
+
+    La latencia se mide solo en las descargas completas de perfiles (200 no cacheados): las
+    hojas del listado y los 304 son mucho más rápidos y harían parecer lento a un sitio sano.
+    La referencia baja de inmediato con una ventana más rápida y, si no, se acerca a la mediana
+    de cada ventana en una fracción `ADAPTATIVA_DECAIMIENTO`, así una sola ventana rápida no la
+    fija para siempre.
+    """
+
+    def __init__(self, crawler):
+        s = crawler.settings
+        if not s.getbool("ADAPTATIVA_ENABLED"):
+            raise NotConfigured
+        self.crawler = crawler
+        self.minimo = max(1, s.getint("ADAPTATIVA_MIN", 4))
+        self.maximo = max(self.minimo, s.getint("ADAPTATIVA_MAX", s.getint("CONCURRENT_REQUESTS")))
+        self.concurrencia = min(max(s.getint("ADAPTATIVA_INICIAL", 8), self.minimo), self.maximo)
+        self.intervalo = s.getfloat("ADAPTATIVA_INTERVALO", 5)
+        self.error_max = s.getfloat("ADAPTATIVA_ERROR_MAX", 0.05)
+        self.factor_latencia = s.getfloat("ADAPTATIVA_FACTOR_LATENCIA", 2.0)
+        self.paso = s.getint("ADAPTATIVA_PASO", 2)
+        self.decaimiento = s.getfloat("ADAPTATIVA_DECAIMIENTO", 0.1)
+
+        self.latencia_base: float | None = None
+        self.tarea = None
+        self._reiniciar_ventana()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        ext = cls(crawler)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.response_downloaded, signal=signals.response_downloaded)
+        crawler.signals.connect(ext.request_left_downloader, signal=signals.request_left_downloader)
+        return ext
+
+    def _reiniciar_ventana(self):
+        self.latencias: list[float] = []
+        self.salidas = 0
+        self.respuestas = 0
+        self.errores_http = 0
+        self.limitadas = 0
+
+    def spider_opened(self, spider):
+        self._aplicar()
+        logger.info(f"⚙️  Concurrencia adaptativa: inicio en {self.concurrencia} ({self.minimo}-{self.maximo})")
+        self.tarea = task.LoopingCall(self.ajustar)
+        self.tarea.start(self.intervalo, now=False)
+
+    def spider_closed(self, spider):
+        if self.tarea is not None and self.tarea.running:
+            self.tarea.stop()
+
+    def response_downloaded(self, response, request, spider):
+        self.respuestas += 1
+        if response.status == 200 and "hoja" not in request.meta and "cached" not in response.flags:
+            self.latencias.append(request.meta.get("download_latency", 0.0))
+        if response.status == 429:
+            self.limitadas += 1
+        elif response.status >= 500:
+            self.errores_http += 1
+
+    def request_left_downloader(self, request, spider):
+        self.salidas += 1
+
+    def ajustar(self):
+        fallos = max(0, self.salidas - self.respuestas)
+        total = self.respuestas + fallos
+        if total == 0:
+            return
+        tasa_error = (fallos + self.errores_http + self.limitadas) / total
+        latencia = _mediana(self.latencias) if self.latencias else None
+        # La comparación usa la referencia de las ventanas anteriores
+        base = self.latencia_base
+
+        anterior = self.concurrencia
+        if self.limitadas or tasa_error > self.error_max:
+            self.concurrencia = max(self.minimo, self.concurrencia // 2)
+            motivo = f"errores {tasa_error:.1%} (429: {self.limitadas}, fallos: {fallos})"
+        elif latencia is not None and base is not None and latencia > base * self.factor_latencia:
+            self.concurrencia = max(self.minimo, int(self.concurrencia * 0.75))
+            motivo = f"latencia {latencia:.2f} s > {self.factor_latencia:g} x {base:.2f} s"
+        elif self._hay_demanda():
+            self.concurrencia = min(self.maximo, self.concurrencia + self.paso)
+            motivo = f"sitio sano (latencia {latencia or 0:.2f} s, errores {tasa_error:.1%})"
+        else:
+            motivo = None
+
+        if latencia is not None:
+            if base is None or latencia < base:
+                self.latencia_base = latencia
+            else:
+                self.latencia_base = base + self.decaimiento * (latencia - base)
+
+        if self.concurrencia != anterior:
+            logger.info(f"⚙️  Concurrencia {anterior} -> {self.concurrencia}: {motivo}")
+            self._aplicar()
+        self.crawler.stats.set_value("adaptativa/concurrencia", self.concurrencia)
+        self.crawler.stats.max_value("adaptativa/concurrencia_max", self.concurrencia)
+        self._reiniciar_ventana()
+
+    def _hay_demanda(self) -> bool:
+        """Solo tiene sentido subir la concurrencia si los slots están llenos."""
+        slots = self.crawler.engine.downloader.slots.values()
+        return any(len(slot.active) >= slot.concurrency for slot in slots)
+
+    def _aplicar(self):
+        downloader = self.crawler.engine.downloader
+        # Los slots nuevos heredan domain_concurrency; los existentes se actualizan en caliente
+        downloader.domain_concurrency = self.concurrencia
+        for clave, slot in downloader.slots.items():
+            # La pasada de reintentos mantiene su propia concurrencia (ver `_fallidos`)
+            if clave != SLOT_FALLIDOS:
+                slot.concurrency = self.concurrencia
@@ -0,0 +1,272 @@
+"""
+Índice de consultas sobre la salida de la crawl.
+
+Convierte el CSV (o Parquet) de `main_scrapy` en una base SQLite compacta con índices por
+institución, nombre normalizado, cargo e id del perfil, para responder consultas puntuales
+sin cargar las ~35 000 filas en memoria. Las instituciones y los cargos se guardan una sola
+vez en sus propias tablas y los funcionarios solo guardan su id.
+
+Uso:
+    python _consultas.py construir funcionarios/funcionarios_publicos_20250101.csv
+    python _consultas.py institucion funcionarios_publicos_20250101.sqlite3 "CEPLAN"
+    python _consultas.py nombre funcionarios_publicos_20250101.sqlite3 "juan per" --limite 20
+    python _consultas.py cargo funcionarios_publicos_20250101.sqlite3 "Jefe de Oficina" --json
+    python _consultas.py id funcionarios_publicos_20250101.sqlite3 12345
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from _extractor import CAMPOS
+from _normalizacion import clave_busqueda
+
+# Id numérico del perfil: https://www.gob.pe/institucion/<slug>/funcionarios/<id>-<nombre>
+_ID_PERFIL = re.compile(r"/funcionarios/(\d+)")
+
+_ESQUEMA = """
+CREATE TABLE instituciones (id INTEGER PRIMARY KEY, nombre TEXT NOT NULL, clave TEXT NOT NULL UNIQUE);
+CREATE TABLE cargos (id INTEGER PRIMARY KEY, nombre TEXT NOT NULL, clave TEXT NOT NULL UNIQUE);
+CREATE TABLE funcionarios (
+    id INTEGER PRIMARY KEY,
+    id_perfil INTEGER,
+    url TEXT NOT NULL UNIQUE,
+    nombre TEXT,
+    nombre_clave TEXT,
+    institucion_id INTEGER REFERENCES instituciones (id),
+    cargo_id INTEGER REFERENCES cargos (id),
+    fecha_inicio TEXT,
+    correo TEXT,
+    telefono TEXT,
+    resolucion TEXT,
+    resumen TEXT
+);
+"""
+
+_INDICES = """
+CREATE INDEX funcionarios_institucion ON funcionarios (institucion_id, nombre_clave);
+CREATE INDEX funcionarios_cargo ON funcionarios (cargo_id, nombre_clave);
+CREATE INDEX funcionarios_nombre ON funcionarios (nombre_clave);
+CREATE INDEX funcionarios_id_perfil ON funcionarios (id_perfil);
+"""
+
+# Columnas de `CAMPOS` que no están en `funcionarios`, sino en sus tablas de nombres
+_COLUMNAS_NORMALIZADAS = {"institucion": "i.nombre", "cargo": "c.nombre"}
+_SELECT = f"""
+SELECT {", ".join(_COLUMNAS_NORMALIZADAS.get(campo, f"f.{campo}") for campo in CAMPOS)}
+FROM funcionarios f
+LEFT JOIN instituciones i ON i.id = f.institucion_id
+LEFT JOIN cargos c ON c.id = f.cargo_id
+"""
+
+
+def id_perfil(url: str) -> int | None:
+    """Id numérico del perfil en gob.pe, o None si el URL no lo tiene."""
+    coincidencia = _ID_PERFIL.search(url or "")
+    return int(coincidencia.group(1)) if coincidencia else None
+
+
+def _leer_filas(origen: Path):
+    if origen.suffix.lower() == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Leer Parquet requiere pyarrow: pip install pyarrow") from None
+        for fila in pq.read_table(origen).to_pylist():
+            yield {k: (v.isoformat() if hasattr(v, "isoformat") else v) for k, v in fila.items()}
+        return
+    with open(origen, encoding="utf-8-sig", newline="") as archivo:
+        yield from csv.DictReader(archivo, delimiter=";")
+
+
+def construir_indice(origen: str | Path, destino: str | Path | None = None) -> Path:
+    """
+    Construye la base de consultas a partir de la salida de `main_scrapy` y devuelve su ruta
+    (por defecto, la del origen con extensión `.sqlite3`). La base se escribe en un archivo
+    temporal y se reemplaza al final, así que las consultas en curso nunca ven una base a medias.
+    """
+    origen = Path(origen)
+    destino = Path(destino) if destino else origen.with_suffix(".sqlite3")
+    temporal = destino.with_suffix(destino.suffix + ".tmp")
+    temporal.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(str(temporal))
+    conn.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;" + _ESQUEMA)
+    # Cada institución y cargo distinto se guarda una vez y se referencia por id
+    internados: dict[str, dict[str, int]] = {"instituciones": {}, "cargos": {}}
+
+    def internar(tabla: str, valor: str | None) -> int | None:
+        if not valor:
+            return None
+        clave = clave_busqueda(valor)
+        ids = internados[tabla]
+        if clave not in ids:
+            ids[clave] = conn.execute(
+                f"INSERT INTO {tabla} (nombre, clave) VALUES (?, ?)", (valor, clave)
+            ).lastrowid
+        return ids[clave]
+
+    filas = (
+        (
+            id_perfil(fila["url"]),
+            fila["url"],
+            fila["nombre"] or None,
+            clave_busqueda(fila["nombre"]) if fila["nombre"] else None,
+            internar("instituciones", fila["institucion"]),
+            internar("cargos", fila["cargo"]),
+            fila["fecha_inicio"] or None,
+            fila["correo"] or None,
+            fila["telefono"] or None,
+            fila["resolucion"] or None,
+            fila["resumen"] or None,
+        )
+        for fila in _leer_filas(origen)
+        if fila.get("url")
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO funcionarios (id_perfil, url, nombre, nombre_clave, institucion_id, cargo_id, "
+        "fecha_inicio, correo, telefono, resolucion, resumen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        filas,
+    )
+    # Los índices se crean al final: es más rápido que mantenerlos durante la carga
+    conn.executescript(_INDICES + "ANALYZE;")
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    os.replace(temporal, destino)
+    return destino
+
+
+class ConsultaFuncionarios:
+    """
+    Consultas de solo lectura sobre una base creada con `construir_indice`.
+
+    La base se abre con `mmap_size`, de modo que SQLite lee las páginas directamente del
+    archivo mapeado en memoria y solo las que necesita cada consulta. Los textos de búsqueda
+    se comparan sin tildes ni mayúsculas.
+    """
+
+    def __init__(self, ruta: str | Path, mmap_mb: int = 256):
+        ruta = Path(ruta)
+        if not ruta.exists():
+            raise FileNotFoundError(f"No existe la base de consultas: {ruta}")
+        self.conn = sqlite3.connect(f"{ruta.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.execute(f"PRAGMA mmap_size = {mmap_mb * 1024 * 1024}")
+
+    def _consultar(self, condicion: str, parametros: tuple, limite: int | None) -> list[dict]:
+        sql = f"{_SELECT} WHERE {condicion} ORDER BY f.nombre_clave"
+        if limite is not None:
+            sql += f" LIMIT {int(limite)}"
+        return [dict(zip(CAMPOS, fila)) for fila in self.conn.execute(sql, parametros)]
+
+    def por_institucion(self, institucion: str, limite: int | None = None) -> list[dict]:
+        """Funcionarios de una institución (nombre exacto, sin distinguir tildes ni mayúsculas)."""
+        return self._consultar(
+            "f.institucion_id = (SELECT id FROM instituciones WHERE clave = ?)",
+            (clave_busqueda(institucion),),
+            limite,
+        )
+
+    def por_cargo(self, cargo: str, limite: int | None = None) -> list[dict]:
+        """Funcionarios que ocupan un cargo (nombre exacto, sin distinguir tildes ni mayúsculas)."""
+        return self._consultar(
+            "f.cargo_id = (SELECT id FROM cargos WHERE clave = ?)", (clave_busqueda(cargo),), limite
+        )
+
+    def por_nombre(self, prefijo: str, limite: int | None = 50) -> list[dict]:
+        """Funcionarios cuyo nombre empieza por `prefijo`."""
+        clave = clave_busqueda(prefijo)
+        if not clave:
+            return []
+        # Rango sobre el índice en lugar de LIKE, que SQLite no siempre puede resolver con índices
+        return self._consultar("f.nombre_clave >= ? AND f.nombre_clave < ?", (clave, clave + "\uffff"), limite)
+
+    def por_id(self, id_perfil: int) -> dict | None:
+        """Funcionario con el id numérico de su perfil en gob.pe."""
+        filas = self._consultar("f.id_perfil = ?", (int(id_perfil),), 1)
+        return filas[0] if filas else None
+
+    def por_url(self, url: str) -> dict | None:
+        filas = self._consultar("f.url = ?", (url,), 1)
+        return filas[0] if filas else None
+
+    def instituciones(self, texto: str = "") -> list[tuple[str, int]]:
+        """Instituciones que contienen `texto`, con su número de funcionarios."""
+        return self.conn.execute(
+            """
+            SELECT i.nombre, COUNT(f.id) FROM instituciones i
+            LEFT JOIN funcionarios f ON f.institucion_id = i.id
+            WHERE i.clave LIKE ? GROUP BY i.id ORDER BY i.clave
+            """,
+            (f"%{clave_busqueda(texto)}%",),
+        ).fetchall()
+
+    def cerrar(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    construir = comandos.add_parser("construir", help="crea la base de consultas desde un CSV o Parquet")
+    construir.add_argument("origen", type=Path)
+    construir.add_argument("--destino", type=Path)
+
+    for comando, ayuda in (
+        ("institucion", "funcionarios de una institución"),
+        ("cargo", "funcionarios que ocupan un cargo"),
+        ("nombre", "funcionarios cuyo nombre empieza por el texto"),
+        ("id", "funcionario por id de perfil"),
+        ("instituciones", "instituciones que contienen el texto"),
+    ):
+        sub = comandos.add_parser(comando, help=ayuda)
+        sub.add_argument("base", type=Path)
+        sub.add_argument("texto", nargs="?" if comando == "instituciones" else None, default="")
+        sub.add_argument("--limite", type=int)
+        sub.add_argument("--json", action="store_true", help="imprime los resultados en JSON")
+
+    args = parser.parse_args(argv)
+    if args.comando == "construir":
+        inicio = time.perf_counter()
+        destino = construir_indice(args.origen, args.destino)
+        print(f"Base de consultas creada en {destino} ({time.perf_counter() - inicio:.1f} s)")
+        return
+
+    with ConsultaFuncionarios(args.base) as consulta:
+        inicio = time.perf_counter()
+        if args.comando == "institucion":
+            resultados = consulta.por_institucion(args.texto, args.limite)
+        elif args.comando == "cargo":
+            resultados = consulta.por_cargo(args.texto, args.limite)
+        elif args.comando == "nombre":
+            resultados = consulta.por_nombre(args.texto, args.limite)
+        elif args.comando == "id":
+            resultados = [r for r in [consulta.por_id(int(args.texto))] if r is not None]
+        else:
+            resultados = [
+                {"institucion": nombre, "funcionarios": n}
+                for nombre, n in consulta.instituciones(args.texto)[: args.limite]
+            ]
+        milisegundos = (time.perf_counter() - inicio) * 1000
+
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False, indent=2))
+    else:
+        for r in resultados:
+            print(" | ".join(str(v) for k, v in r.items() if k != "resumen"))
+    print(f"{len(resultados)} resultados en {milisegundos:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
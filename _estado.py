@@ -0,0 +1,146 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+
+def huella(datos: bytes | dict) -> str:
+    """Calcula el hash SHA-1 del contenido de una respuesta o de un item."""
+    if isinstance(datos, dict):
+        datos = json.dumps(datos, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(datos).hexdigest()
+
+
+@dataclass(frozen=True)
+class PerfilGuardado:
+    url: str
+    hash_contenido: str | None
+    etag: str | None
+    last_modified: str | None
+    hash_item: str | None
+    item: dict | None
+
+
+class EstadoFuncionarios:
+    """
+    Almacén local del estado de cada funcionario, indexado por el URL de su perfil.
+
+    Guarda el hash del HTML, las cabeceras `ETag`/`Last-Modified` y el último item extraído,
+    de modo que una corrida incremental pueda revalidar perfiles sin volver a procesarlos y
+    clasificar cada item como nuevo, modificado o eliminado.
+
+    La conexión se comparte entre el hilo del reactor y los hilos donde `IncrementalPipeline`
+    registra los items, así que todos los accesos pasan por un mismo lock.
+    """
+
+    def __init__(self, ruta: str | Path, commit_cada: int = 500):
+        Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(ruta), check_same_thread=False)
+        self._lock = threading.RLock()
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS perfiles (
+                url TEXT PRIMARY KEY,
+                hash_contenido TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                hash_item TEXT,
+                item TEXT
+            )
+            """
+        )
+        self.commit_cada = commit_cada
+        self.vistos: set[str] = set()
+        self._escrituras = 0
+
+    def obtener(self, url: str) -> PerfilGuardado | None:
+        with self._lock:
+            fila = self.conn.execute(
+                "SELECT url, hash_contenido, etag, last_modified, hash_item, item FROM perfiles WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if fila is None:
+                return None
+            *campos, item = fila
+            return PerfilGuardado(*campos, item=json.loads(item) if item else None)
+
+    def cabeceras_condicionales(self, url: str) -> dict[str, str]:
+        """Cabeceras `If-None-Match`/`If-Modified-Since` para revalidar un perfil ya conocido."""
+        perfil = self.obtener(url)
+        if perfil is None or perfil.item is None:
+            return {}
+        cabeceras = {}
+        if perfil.etag:
+            cabeceras["If-None-Match"] = perfil.etag
+        if perfil.last_modified:
+            cabeceras["If-Modified-Since"] = perfil.last_modified
+        return cabeceras
+
+    def registrar_respuesta(self, url: str, hash_contenido: str, etag: str | None, last_modified: str | None):
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT INTO perfiles (url, hash_contenido, etag, last_modified) VALUES (?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    hash_contenido = excluded.hash_contenido,
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified
+                """,
+                (url, hash_contenido, etag, last_modified),
+            )
+            self._escribir()
+
+    def registrar_item(self, url: str, item: dict) -> str | None:
+        """
+        Guarda el último item de un perfil y devuelve el tipo de cambio respecto a la corrida
+        anterior: "nuevo", "modificado" o None si no hubo cambios.
+        """
+        with self._lock:
+            self.vistos.add(url)
+            perfil = self.obtener(url)
+            hash_item = huella(item)
+            if perfil is not None and perfil.hash_item == hash_item:
+                return None
+
+            self.conn.execute(
+                """
+                INSERT INTO perfiles (url, hash_item, item) VALUES (?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET hash_item = excluded.hash_item, item = excluded.item
+                """,
+                (url, hash_item, json.dumps(item, ensure_ascii=False)),
+            )
+            self._escribir()
+            return "nuevo" if perfil is None or perfil.item is None else "modificado"
+
+    def eliminados(self, instituciones: list[str] | None = None) -> list[PerfilGuardado]:
+        """
+        Perfiles guardados que no aparecieron en la corrida actual; si se indican
+        `instituciones` (slugs), solo entre los perfiles de esas instituciones.
+        """
+        prefijos = tuple(f"/institucion/{slug}/funcionarios/" for slug in instituciones or [])
+        with self._lock:
+            filas = self.conn.execute(
+                "SELECT url FROM perfiles WHERE item IS NOT NULL"
+            ).fetchall()
+            return [
+                self.obtener(url)
+                for (url,) in filas
+                if url not in self.vistos and (not prefijos or any(p in url for p in prefijos))
+            ]
+
+    def purgar(self, urls: list[str]):
+        with self._lock:
+            self.conn.executemany("DELETE FROM perfiles WHERE url = ?", [(url,) for url in urls])
+            self.conn.commit()
+
+    def cerrar(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def _escribir(self):
+        self._escrituras += 1
+        if self._escrituras % self.commit_cada == 0:
+            self.conn.commit()
@@ -1,7 +1,228 @@
-from scrapy.exporters import CsvItemExporter
+import os
+import shutil
+from datetime import date
+from pathlib import Path
+from itemadapter import ItemAdapter
+from scrapy.exporters import BaseItemExporter, CsvItemExporter
+from _metricas import cronometro
 
 class SemiColonCsvItemExporter(CsvItemExporter):
     def __init__(self, *args, **kwargs):
         kwargs.setdefault("delimiter", ";")
         kwargs.setdefault("encoding", "utf-8")
-        super().__init__(*args, **kwargs)
\ No newline at end of file
+        super().__init__(*args, **kwargs)
+
+    def export_item(self, item):
+        with cronometro("exportacion"):
+            super().export_item(item)
+
+    def escribir_cabecera(self):
+        """
+        Escribe la cabecera sin esperar al primer item, de modo que un archivo sin filas
+        también la tenga. Requiere `fields_to_export`.
+        """
+        if self._headers_not_written:
+            self._headers_not_written = False
+            self._write_headers_and_set_fields_to_export({})
+
+
+def _a_fecha(valor) -> date | None:
+    if isinstance(valor, date) or valor is None:
+        return valor
+    try:
+        return date.fromisoformat(str(valor))
+    except ValueError:
+        return None
+
+
+class XlsxItemExporter(BaseItemExporter):
+    """
+    Exportador a Excel (`.xlsx`, requiere `openpyxl`) en modo de solo escritura.
+
+    Cada item se escribe como una fila apenas llega y openpyxl la vuelca a un archivo temporal,
+    así que la memoria no crece con el número de funcionarios; al terminar se arma el `.xlsx`
+    en el archivo del feed. `fecha_inicio` se escribe como celda de fecha, la cabecera queda
+    fija y los textos que Excel no admite (caracteres de control, más de 32 767 caracteres)
+    se limpian en lugar de corromper el archivo.
+    """
+    tipos_fecha = ("fecha_inicio",)
+    max_caracteres = 32767
+    hoja = "funcionarios"
+    anchos = {"nombre": 40, "institucion": 50, "cargo": 50, "url": 60, "resumen": 80}
+
+    def __init__(self, file, **kwargs):
+        try:
+            from openpyxl import Workbook
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+            from openpyxl.styles import Font
+            from openpyxl.utils import get_column_letter
+        except ImportError as e:
+            raise ImportError("El exportador Excel requiere openpyxl: pip install openpyxl") from e
+        self._celda, self._ilegales, self._letra = WriteOnlyCell, ILLEGAL_CHARACTERS_RE, get_column_letter
+        self._negrita = Font(bold=True)
+
+        super().__init__(dont_fail=True, **kwargs)
+        self.file = file
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(self.hoja)
+        self._cabecera_escrita = False
+
+    def export_item(self, item):
+        with cronometro("exportacion"):
+            self._exportar(item)
+
+    def _exportar(self, item):
+        if not self._cabecera_escrita:
+            self.fields_to_export = list(self.fields_to_export or ItemAdapter(item).field_names())
+            self._escribir_cabecera()
+        fila = []
+        for campo, valor in self._get_serialized_fields(item, default_value=None, include_empty=True):
+            if isinstance(valor, date):
+                celda = self._celda(self.sheet, value=valor)
+                celda.number_format = "yyyy-mm-dd"
+                fila.append(celda)
+            else:
+                fila.append(valor)
+        self.sheet.append(fila)
+
+    def _escribir_cabecera(self):
+        # En modo de solo escritura, anchos y paneles fijos deben definirse antes de la primera fila
+        for i, campo in enumerate(self.fields_to_export, start=1):
+            self.sheet.column_dimensions[self._letra(i)].width = self.anchos.get(campo, 20)
+        self.sheet.freeze_panes = "A2"
+        cabecera = []
+        for campo in self.fields_to_export:
+            celda = self._celda(self.sheet, value=campo)
+            celda.font = self._negrita
+            cabecera.append(celda)
+        self.sheet.append(cabecera)
+        self._cabecera_escrita = True
+
+    def serialize_field(self, field, name, value):
+        if name in self.tipos_fecha:
+            return _a_fecha(value)
+        if value is None:
+            return None
+        return self._ilegales.sub("", str(value))[: self.max_caracteres]
+
+    def finish_exporting(self):
+        self.workbook.save(self.file)
+
+
+class ParquetItemExporter(BaseItemExporter):
+    """
+    Exportador columnar en formato Parquet (requiere `pyarrow`).
+
+    Acumula los items en grupos de `row_group_size` filas y escribe cada grupo apenas se llena,
+    de modo que la memoria no crece con el número de funcionarios. Las columnas son texto,
+    salvo `fecha_inicio`, que se escribe como fecha.
+
+    Con `partition_by` (p. ej. `["institucion"]`) las filas se escriben como dataset
+    particionado estilo Hive en `partition_dir` (por defecto, la ruta del feed sin extensión)
+    y el archivo del feed solo contiene el esquema. Los lotes se acumulan en un Parquet sin
+    particionar (`<partition_dir>.lotes.parquet`) y el dataset se escribe de una vez al terminar,
+    con un solo archivo por partición en vez de uno por lote y partición. Se escribe en una
+    carpeta temporal (`<partition_dir>.tmp`) que reemplaza a `partition_dir`, así el dataset
+    nunca mezcla archivos de corridas anteriores y la versión previa queda intacta si la crawl
+    no termina.
+    """
+    tipos_fecha = ("fecha_inicio",)
+
+    def __init__(
+        self,
+        file,
+        *,
+        row_group_size: int = 5000,
+        compression: str = "zstd",
+        partition_by: list[str] | None = None,
+        partition_dir: str | Path | None = None,
+        **kwargs,
+    ):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("El exportador Parquet requiere pyarrow: pip install pyarrow") from e
+        self._pa, self._pq = pa, pq
+
+        super().__init__(dont_fail=True, **kwargs)
+        self.file = file
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.partition_by = list(partition_by or [])
+        if self.partition_by and partition_dir is None:
+            partition_dir = Path(getattr(file, "name", "salida.parquet")).with_suffix("")
+        self.partition_dir = Path(partition_dir) if partition_dir else None
+        self.partition_tmp = self.partition_lotes = None
+        if self.partition_dir is not None:
+            self.partition_tmp = self.partition_dir.with_name(f"{self.partition_dir.name}.tmp")
+            self.partition_lotes = self.partition_dir.with_name(f"{self.partition_dir.name}.lotes.parquet")
+            # Restos de un intento anterior que no llegó a terminar
+            shutil.rmtree(self.partition_tmp, ignore_errors=True)
+            self.partition_lotes.unlink(missing_ok=True)
+
+        self.schema = None
+        self.writer = None
+        self._buffer: list[dict] = []
+
+    def _crear_esquema(self, campos: list[str]):
+        pa = self._pa
+        return pa.schema(
+            [(campo, pa.date32() if campo in self.tipos_fecha else pa.string()) for campo in campos]
+        )
+
+    def export_item(self, item):
+        with cronometro("exportacion"):
+            self._exportar(item)
+
+    def _exportar(self, item):
+        if self.schema is None:
+            self.fields_to_export = list(self.fields_to_export or ItemAdapter(item).field_names())
+            self.schema = self._crear_esquema(self.fields_to_export)
+        fila = dict(self._get_serialized_fields(item, default_value=None, include_empty=True))
+        self._buffer.append(fila)
+        if len(self._buffer) >= self.row_group_size:
+            self._escribir_lote()
+
+    def serialize_field(self, field, name, value):
+        if name in self.tipos_fecha:
+            return _a_fecha(value)
+        return None if value is None else str(value)
+
+    def _escribir_lote(self):
+        if not self._buffer:
+            return
+        columnas = {campo.name: [fila.get(campo.name) for fila in self._buffer] for campo in self.schema}
+        tabla = self._pa.Table.from_pydict(columnas, schema=self.schema)
+        self._buffer = []
+
+        if self.writer is None:
+            # Particionado: los lotes van al archivo intermedio y no al feed
+            destino = str(self.partition_lotes) if self.partition_dir is not None else self.file
+            self.writer = self._pq.ParquetWriter(destino, self.schema, compression=self.compression)
+        self.writer.write_table(tabla, row_group_size=self.row_group_size)
+
+    def finish_exporting(self):
+        self._escribir_lote()
+        if self.writer is not None:
+            self.writer.close()
+        if self.partition_dir is None:
+            return
+
+        if self.partition_lotes.exists():
+            self._pq.write_to_dataset(
+                self._pq.read_table(self.partition_lotes, schema=self.schema),
+                root_path=str(self.partition_tmp),
+                partition_cols=self.partition_by,
+                basename_template="parte-{i}.parquet",
+                compression=self.compression,
+            )
+            self.partition_lotes.unlink()
+        if self.schema is not None:
+            # El feed guarda solo el esquema (archivo Parquet sin filas)
+            self._pq.ParquetWriter(self.file, self.schema, compression=self.compression).close()
+        # Igual que el feed (`overwrite: True`), el dataset reemplaza al de la corrida anterior
+        shutil.rmtree(self.partition_dir, ignore_errors=True)
+        if self.partition_tmp.exists():
+            os.replace(self.partition_tmp, self.partition_dir)
@@ -0,0 +1,136 @@
+from dataclasses import dataclass, fields
+from lxml import etree, html
+from _normalizacion import clave_busqueda
+
+@dataclass(frozen=True)
+class FuncionarioXPaths:
+    nombre: str = '//h1[@class="text-2xl leading-8"]/text()'
+    institucion: str = '//h2[contains(@class, "text-base")]//a/text()'
+    cargo: str = '//h1/following-sibling::div[@class="mt-2"][1]/text()'
+    fecha_inicio: str = '//span[@class="ml-1"]/text()'
+    correo: str = '//span[contains(text(), "@")]/text()'
+    telefono: str = '//a[@aria-label[contains(.,"Llamar al número")]]/text()'
+    resolucion: str = '//div[contains(@class, "mt-3 font-bold")]//div/text()[normalize-space()]'
+    resumen: str = '//div[@class="leading-6"]//text()'
+
+
+@dataclass(frozen=True)
+class TarjetaXPaths:
+    """Campos visibles en cada tarjeta del listado (relativos al enlace `<a>` de la tarjeta)."""
+    nombre: str = './/h3/text()'
+    cargo: str = './/p[contains(@class, "text-sm")][1]/text()'
+    institucion: str = './/p[contains(@class, "text-sm")][2]/text()'
+
+
+# Columnas de los items, en el orden en que se exportan
+CAMPOS = tuple(f.name for f in fields(FuncionarioXPaths) if f.name != "resumen") + ("url", "resumen")
+CAMPOS_TARJETA = tuple(f.name for f in fields(TarjetaXPaths))
+
+
+def limpiar_resumen(textos: list[str]) -> str:
+    """Une los fragmentos del resumen quitando espacios, saltos y \\xa0."""
+    return " ".join([t.strip().replace("\xa0", " ") for t in textos if t.strip()])
+
+
+class ExtractorFuncionario:
+    """
+    Extrae los campos de un perfil con las expresiones de `FuncionarioXPaths` compiladas una
+    sola vez, en lugar de compilar cada XPath en cada respuesta.
+
+    En vez de recorrer el documento completo (navegación, pie de página) una vez por campo, se
+    ubica primero el contenedor del perfil: el ancestro más cercano del título (`<h1>` con la
+    clase `clase_titulo`) que también incluye el resumen. Los campos se evalúan con las mismas
+    expresiones, pero relativas a ese contenedor; solo si un campo no aparece en él se busca en
+    todo el documento (p. ej. si el sitio saca algún bloque del contenedor).
+
+    No equivale exactamente a evaluar las expresiones sobre todo el documento: si un campo
+    coincide también fuera del contenedor y antes que él (p. ej. un correo de contacto en la
+    cabecera), aquí se toma el del perfil y no esa primera coincidencia. `bench_extractor.py`
+    compara ambas extracciones sobre los perfiles grabados con `grabar_fixtures.py`.
+
+    Trabaja directamente sobre el árbol lxml (el que ya construyó Scrapy en `response.selector`
+    o el que se obtiene con `extraer_html`), por lo que el documento se parsea una sola vez.
+    """
+    clase_titulo = "text-2xl leading-8"
+    contenedor = 'ancestor::*[.//div[@class="leading-6"]][1]'
+
+    def __init__(self, xpaths: FuncionarioXPaths = FuncionarioXPaths()):
+        self.expresiones = {
+            campo.name: etree.XPath(getattr(xpaths, campo.name), smart_strings=False)
+            for campo in fields(xpaths)
+        }
+        # Todas las expresiones de `FuncionarioXPaths` empiezan con "//"
+        self.relativas = {
+            campo.name: etree.XPath("." + getattr(xpaths, campo.name), smart_strings=False)
+            for campo in fields(xpaths)
+        }
+        self._contenedor = etree.XPath(self.contenedor)
+
+    def ubicar_contenedor(self, root):
+        """Contenedor del perfil, o None si el documento no tiene el título esperado."""
+        # `iter` filtra por etiqueta en C, sin pasar por el motor XPath
+        for titulo in root.iter("h1"):
+            if titulo.get("class") == self.clase_titulo:
+                contenedor = self._contenedor(titulo)
+                return contenedor[0] if contenedor else None
+        return None
+
+    def _evaluar(self, root, contenedor, campo: str) -> list:
+        if contenedor is not None:
+            resultado = self.relativas[campo](contenedor)
+            if resultado:
+                return resultado
+        return self.expresiones[campo](root)
+
+    def extraer_campo(self, root, campo: str, contenedor=None) -> str | None:
+        resultado = self._evaluar(root, contenedor, campo)
+        return str(resultado[0]) if resultado else None
+
+    def extraer(self, root, url: str) -> dict:
+        """Devuelve el item del funcionario con el mismo esquema que `FuncionariosSpider`."""
+        contenedor = self.ubicar_contenedor(root)
+        item = {
+            campo: self.extraer_campo(root, campo, contenedor)
+            for campo in self.expresiones
+            if campo != "resumen"
+        }
+        item["url"] = url
+        item["resumen"] = limpiar_resumen(self._evaluar(root, contenedor, "resumen"))
+        return item
+
+    def extraer_html(self, body: bytes, url: str, encoding: str = "utf-8") -> dict:
+        """Parsea el HTML de un perfil y extrae sus campos."""
+        parser = html.HTMLParser(recover=True, encoding=encoding)
+        root = etree.fromstring(body, parser=parser)
+        if root is None:
+            root = etree.fromstring(b"<html/>", parser=parser)
+        return self.extraer(root, url)
+
+
+class ExtractorTarjeta:
+    """
+    Extrae de una tarjeta del listado los campos que ya muestra (nombre, cargo e institución),
+    sin visitar el perfil. Los demás campos quedan en None para mantener el mismo esquema.
+    """
+
+    def __init__(self, xpaths: TarjetaXPaths = TarjetaXPaths()):
+        self.expresiones = {
+            campo.name: etree.XPath(getattr(xpaths, campo.name), smart_strings=False)
+            for campo in fields(xpaths)
+        }
+
+    def extraer(self, nodo, url: str) -> dict:
+        item = dict.fromkeys(CAMPOS)
+        for campo, expresion in self.expresiones.items():
+            resultado = expresion(nodo)
+            item[campo] = str(resultado[0]).strip() if resultado else None
+        item["url"] = url
+        return item
+
+
+def tarjeta_modificada(item: dict, tarjeta: dict) -> bool:
+    """Indica si la tarjeta del listado difiere del último item guardado del funcionario."""
+    return any(
+        clave_busqueda(item.get(campo) or "") != clave_busqueda(tarjeta.get(campo) or "")
+        for campo in CAMPOS_TARJETA
+    )
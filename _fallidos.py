@@ -0,0 +1,189 @@
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider, NotConfigured
+from scrapy.spidermiddlewares.httperror import HttpError
+from twisted.internet import defer, task
+
+logger = logging.getLogger(__name__)
+
+# Slot de descarga propio de la pasada de reintentos, con su propia concurrencia y demora
+SLOT_FALLIDOS = "fallidos"
+
+# Respuestas que no se arreglan reintentando: el perfil ya no existe
+ESTADOS_DEFINITIVOS = (404, 410)
+
+
+def motivo_fallo(failure) -> str:
+    """Descripción corta del fallo de una solicitud, para el registro de fallidos."""
+    error = failure.value
+    if isinstance(error, HttpError):
+        return f"HTTP {error.response.status}"
+    return f"{type(error).__name__}: {error}"[:200]
+
+
+def es_definitivo(failure) -> bool:
+    """Indica si el fallo no tiene sentido reintentarlo en la misma corrida (404, 410)."""
+    error = failure.value
+    return isinstance(error, HttpError) and error.response.status in ESTADOS_DEFINITIVOS
+
+
+@dataclass(frozen=True)
+class PerfilFallido:
+    url: str
+    motivo: str
+    intentos: int
+    ultimo_fallo: float
+
+
+class RegistroFallidos:
+    """
+    Registro persistente (SQLite) de los perfiles que no se pudieron descargar, con el motivo
+    del último fallo y el número de intentos fallidos acumulados entre corridas.
+
+    Un perfil sale del registro en cuanto se descarga bien, así que lo que queda es
+    exactamente lo que falta en la salida. En modo por particiones todos los procesos
+    comparten el mismo archivo; las escrituras son pocas y SQLite las serializa.
+    """
+
+    def __init__(self, ruta: str | Path):
+        Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(ruta), timeout=30)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fallidos (
+                url TEXT PRIMARY KEY,
+                motivo TEXT NOT NULL,
+                intentos INTEGER NOT NULL,
+                primer_fallo REAL NOT NULL,
+                ultimo_fallo REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+        self.urls = {url for (url,) in self.conn.execute("SELECT url FROM fallidos")}
+
+    def registrar(self, url: str, motivo: str) -> int:
+        """Registra un fallo del perfil y devuelve sus intentos fallidos acumulados."""
+        ahora = time.time()
+        (intentos,) = self.conn.execute(
+            """
+            INSERT INTO fallidos (url, motivo, intentos, primer_fallo, ultimo_fallo) VALUES (?, ?, 1, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                motivo = excluded.motivo,
+                intentos = intentos + 1,
+                ultimo_fallo = excluded.ultimo_fallo
+            RETURNING intentos
+            """,
+            (url, motivo, ahora, ahora),
+        ).fetchone()
+        # Commit inmediato: los fallos son pocos y no deben perderse si se corta la crawl
+        self.conn.commit()
+        self.urls.add(url)
+        return intentos
+
+    def resolver(self, url: str) -> bool:
+        """Quita el perfil del registro tras una descarga exitosa; indica si estaba registrado."""
+        if url not in self.urls:
+            return False
+        self.conn.execute("DELETE FROM fallidos WHERE url = ?", (url,))
+        self.conn.commit()
+        self.urls.discard(url)
+        return True
+
+    def pendientes(self) -> list[PerfilFallido]:
+        return [
+            PerfilFallido(*fila)
+            for fila in self.conn.execute(
+                "SELECT url, motivo, intentos, ultimo_fallo FROM fallidos ORDER BY url"
+            )
+        ]
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def cerrar(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+class ReintentoFallidos:
+    """
+    Pasada diferida de reintentos: cuando la crawl se queda sin solicitudes, vuelve a pedir
+    los perfiles que fallaron en esta corrida (tras agotar `RETRY_TIMES`), en lugar de darlos
+    por perdidos.
+
+    Hace hasta `FALLIDOS_PASADAS` pasadas, esperando antes de cada una `FALLIDOS_ESPERA`
+    segundos, el doble en la siguiente, y así sucesivamente, para dar tiempo a que el sitio se
+    recupere. Los reintentos van por un slot de descarga propio con `FALLIDOS_CONCURRENCIA`
+    solicitudes a la vez y `FALLIDOS_DEMORA` segundos entre ellas.
+    """
+
+    def __init__(self, crawler, pasadas: int, espera: float, concurrencia: int, demora: float):
+        self.crawler = crawler
+        self.pasadas = pasadas
+        self.espera = espera
+        self.concurrencia = max(1, concurrencia)
+        self.demora = demora
+        self.pasada = 0
+        self.programada = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        s = crawler.settings
+        pasadas = s.getint("FALLIDOS_PASADAS", 3)
+        if pasadas <= 0:
+            raise NotConfigured
+        ext = cls(
+            crawler,
+            pasadas,
+            s.getfloat("FALLIDOS_ESPERA", 10),
+            s.getint("FALLIDOS_CONCURRENCIA", 2),
+            s.getfloat("FALLIDOS_DEMORA", 0.5),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.crawler.engine.downloader.per_slot_settings[SLOT_FALLIDOS] = {
+            "concurrency": self.concurrencia,
+            "delay": self.demora,
+            "randomize_delay": False,
+        }
+
+    def spider_idle(self, spider):
+        if self.programada is not None:
+            raise DontCloseSpider
+        urls = sorted(getattr(spider, "por_reintentar", ()))
+        if not urls:
+            return
+        if self.pasada >= self.pasadas:
+            logger.warning(f"🪦 {len(urls)} perfiles siguen fallando tras {self.pasadas} pasadas de reintento")
+            return
+
+        # Importado aquí para no instalar el reactor por defecto antes que Scrapy
+        from twisted.internet import reactor
+
+        espera = self.espera * 2**self.pasada
+        self.pasada += 1
+        logger.info(f"🔁 Pasada de reintento {self.pasada}/{self.pasadas}: {len(urls)} perfiles en {espera:g} s")
+        self.programada = task.deferLater(reactor, espera, self.lanzar, spider, urls)
+        self.programada.addErrback(lambda f: f.trap(defer.CancelledError))
+        raise DontCloseSpider
+
+    def lanzar(self, spider, urls: list[str]):
+        self.programada = None
+        self.crawler.stats.inc_value("fallidos/pasadas")
+        for url in urls:
+            self.crawler.stats.inc_value("fallidos/reintentados")
+            self.crawler.engine.crawl(spider.solicitud_reintento(url))
+
+    def spider_closed(self, spider):
+        if self.programada is not None:
+            self.programada.cancel()
+            self.programada = None
@@ -0,0 +1,109 @@
+from collections import deque
+
+
+class FronteraHojas:
+    """
+    Frontera acotada de hojas del listado de funcionarios (`?sheet=N`).
+
+    Reparte las hojas pendientes en una ventana de tamaño fijo: como máximo `ventana` hojas
+    están en vuelo a la vez, de modo que la cola del scheduler nunca acumula todas las
+    solicitudes de detalle del directorio al mismo tiempo.
+
+    Mientras no se conozca el número total de hojas, la frontera avanza de forma secuencial
+    (una hoja nueva por cada hoja con resultados).
+
+    Con `paso` > 1 la frontera recorre solo las hojas `inicio`, `inicio + paso`, ... Así se
+    reparte el listado entre varios procesos sin conocer de antemano el total de hojas.
+    """
+
+    def __init__(self, ventana: int = 16, inicio: int = 1, paso: int = 1):
+        self.ventana = max(1, ventana)
+        self.inicio = inicio
+        self.paso = max(1, paso)
+        self.total: int | None = None
+        self.en_vuelo: set[int] = set()
+        self.completadas: set[int] = set()
+        self._pendientes: deque[int] = deque([inicio])
+        self._ultima_encolada = inicio
+
+    def fijar_total(self, total: int):
+        """Registra el número de hojas y encola todas las que aún no se habían encolado."""
+        if self.total is not None:
+            return
+        self.total = total
+        self._pendientes.extend(range(self._ultima_encolada + self.paso, total + 1, self.paso))
+        self._ultima_encolada = max(self._ultima_encolada, total)
+
+    def extender(self):
+        """Encola la hoja siguiente cuando se desconoce el total (paginación secuencial)."""
+        if self.total is None:
+            self._ultima_encolada += self.paso
+            self._pendientes.append(self._ultima_encolada)
+
+    def cerrar(self, hoja_vacia: int):
+        """
+        Registra una hoja sin funcionarios cuando se desconoce el total (listados sin enlace a
+        la última página, como los de una sola hoja): el total queda en la hoja anterior, así
+        la frontera puede completarse.
+        """
+        if self.total is None:
+            self.fijar_total(max(0, hoja_vacia - 1))
+
+    def siguientes(self, maximo: int | None = None) -> list[int]:
+        """
+        Devuelve las hojas que se pueden solicitar ahora sin exceder la ventana, y como máximo
+        `maximo` (p. ej. lo que queda de una ventana compartida con otras fronteras).
+        """
+        limite = self.ventana if maximo is None else min(self.ventana, len(self.en_vuelo) + maximo)
+        hojas = []
+        while self._pendientes and len(self.en_vuelo) < limite:
+            hoja = self._pendientes.popleft()
+            self.en_vuelo.add(hoja)
+            hojas.append(hoja)
+        return hojas
+
+    def completar(self, hoja: int):
+        """Marca una hoja como procesada y libera su lugar en la ventana."""
+        self.en_vuelo.discard(hoja)
+        self.completadas.add(hoja)
+
+    def liberar(self, hoja: int):
+        """Libera el lugar de una hoja que falló (ya agotó sus reintentos)."""
+        self.en_vuelo.discard(hoja)
+
+    @property
+    def agotada(self) -> bool:
+        return not self._pendientes and not self.en_vuelo
+
+    @property
+    def hojas(self) -> range | None:
+        """Hojas que le corresponden a esta frontera, si ya se conoce el total."""
+        if self.total is None:
+            return None
+        return range(self.inicio, self.total + 1, self.paso)
+
+    @property
+    def completa(self) -> bool:
+        """Indica si se procesaron todas las hojas de la frontera sin fallos."""
+        return self.hojas is not None and self.agotada and self.completadas.issuperset(self.hojas)
+
+    def a_dict(self) -> dict:
+        """Estado serializable de la frontera (las hojas en vuelo se consideran pendientes)."""
+        return {
+            "total": self.total,
+            "completadas": sorted(self.completadas),
+            "ultima_encolada": self._ultima_encolada,
+        }
+
+    def restaurar(self, estado: dict):
+        """Restaura la frontera desde `a_dict`, dejando pendientes las hojas no completadas."""
+        self.total = estado["total"]
+        self.completadas = set(estado["completadas"])
+        self.en_vuelo = set()
+        if self.total is not None:
+            hojas = self.hojas
+        else:
+            ultima = max(self.completadas, default=self.inicio - self.paso)
+            hojas = range(self.inicio, ultima + self.paso + 1, self.paso)
+        self._pendientes = deque(h for h in hojas if h not in self.completadas)
+        self._ultima_encolada = max(estado["ultima_encolada"], hojas[-1] if hojas else self.inicio)
@@ -1,77 +1,319 @@
+from urllib.parse import urlparse
 import scrapy
 from scrapy.core.scraper import Response
-from dataclasses import dataclass
-
-@dataclass(frozen=True)
-class FuncionarioXPaths:
-    nombre: str = '//h1[@class="text-2xl leading-8"]/text()'
-    institucion: str = '//h2[contains(@class, "text-base")]//a/text()'
-    cargo: str = '//h1/following-sibling::div[@class="mt-2"][1]/text()'
-    fecha_inicio: str = '//span[@class="ml-1"]/text()'
-    correo: str = '//span[contains(text(), "@")]/text()'
-    telefono: str = '//a[@aria-label[contains(.,"Llamar al número")]]/text()'
-    resolucion: str = '//div[contains(@class, "mt-3 font-bold")]//div/text()[normalize-space()]'
-    resumen: str = '//div[@class="leading-6"]//text()'
+from _frontier import FronteraHojas
+from _extractor import FuncionarioXPaths, ExtractorFuncionario, ExtractorTarjeta, tarjeta_modificada
+from _estado import EstadoFuncionarios, huella
+from _fallidos import RegistroFallidos, SLOT_FALLIDOS, es_definitivo, motivo_fallo
+from _metricas import cronometro
+from _pool_extraccion import PoolExtraccion
 
 class FuncionariosSpider(scrapy.Spider):
     name = "directorio"
     allowed_domains = ["gob.pe"]
-    start_urls = [
-        "https://www.gob.pe/funcionariospublicos",
-        "https://www.gob.pe/funcionariospublicos?sheet=1",
-    ]
+    base_url = "https://www.gob.pe"
+    listado_url = "{base_url}/funcionariospublicos?sheet={hoja}"
+    institucion_url = "{base_url}/institucion/{institucion}/funcionarios?sheet={hoja}"
 
     xpaths = FuncionarioXPaths()
+    extractor = ExtractorFuncionario(xpaths)
+    extractor_tarjeta = ExtractorTarjeta()
+
+    # Qué perfiles se visitan (`DETALLE_PERFILES`): "todos", "ninguno" (solo las tarjetas del
+    # listado) o "cambios" (solo los nuevos o cuya tarjeta cambió; requiere el modo incremental)
+    detalle = "todos"
 
     total_links = 0
     total_pages = 0
+    total_funcionarios = 0
+
+    estado: EstadoFuncionarios | None = None
+    # Registro de perfiles que no se pudieron descargar (`FALLIDOS_PATH`); con `FALLIDOS_SOLO`
+    # solo se reintentan los perfiles registrados, sin recorrer el listado
+    fallidos: RegistroFallidos | None = None
+    solo_fallidos = False
+    # Checkpoint previo con el que se reanuda la crawl (ver `main_scrapy(resume=True)`)
+    reanudar: dict | None = None
+    # Pool de procesos para la extracción de perfiles (ver `EXTRACCION_PROCESOS`)
+    pool: PoolExtraccion | None = None
+    # Slugs de las instituciones a recorrer (`DIRECTORIO_INSTITUCIONES` o `-a instituciones=a,b`);
+    # si está vacío se recorre el listado general
+    instituciones: list[str] | None = None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        # Sitio alternativo (p. ej. el servidor local de los benchmarks)
+        base_url = crawler.settings.get("DIRECTORIO_BASE_URL")
+        if base_url and base_url.rstrip("/") != spider.base_url:
+            spider.base_url = base_url.rstrip("/")
+            spider.allowed_domains = [urlparse(spider.base_url).hostname]
+        # Modo incremental: estado persistente por URL de perfil
+        ruta_estado = crawler.settings.get("INCREMENTAL_ESTADO_PATH")
+        if ruta_estado:
+            spider.estado = EstadoFuncionarios(ruta_estado)
+        ruta_fallidos = crawler.settings.get("FALLIDOS_PATH")
+        if ruta_fallidos:
+            spider.fallidos = RegistroFallidos(ruta_fallidos)
+        spider.solo_fallidos = crawler.settings.getbool("FALLIDOS_SOLO")
+        if spider.solo_fallidos and spider.fallidos is None:
+            raise ValueError("FALLIDOS_SOLO requiere FALLIDOS_PATH")
+        instituciones = spider.instituciones or crawler.settings.getlist("DIRECTORIO_INSTITUCIONES")
+        if isinstance(instituciones, str):
+            instituciones = instituciones.split(",")
+        spider.instituciones = [slug.strip().strip("/").lower() for slug in instituciones if slug.strip()] or None
+        spider.detalle = crawler.settings.get("DETALLE_PERFILES", "todos")
+        if spider.detalle not in ("todos", "ninguno", "cambios"):
+            raise ValueError(f"DETALLE_PERFILES no válido: {spider.detalle!r}")
+        if spider.detalle == "cambios" and spider.estado is None:
+            raise ValueError('DETALLE_PERFILES = "cambios" requiere INCREMENTAL_ESTADO_PATH')
+        procesos = crawler.settings.getint("EXTRACCION_PROCESOS", 0)
+        if procesos > 0:
+            spider.pool = PoolExtraccion(
+                procesos, crawler.settings.getint("EXTRACCION_EN_VUELO", 64), spider.xpaths
+            )
+        return spider
+
+    @property
+    def listado_completo(self) -> bool:
+        """Indica si se recorrieron todas las hojas de los listados sin fallos."""
+        fronteras = getattr(self, "fronteras", None)
+        return bool(fronteras) and all(frontera.completa for frontera in fronteras.values())
+
+    def hojas_completadas(self) -> int:
+        return sum(len(frontera.completadas) for frontera in self.fronteras.values())
+
+    def hojas_por_recorrer(self) -> int | None:
+        """Hojas que le tocan a esta spider en todos sus listados, si ya se conocen."""
+        hojas = [frontera.hojas for frontera in self.fronteras.values()]
+        return None if any(h is None for h in hojas) else sum(len(h) for h in hojas)
+
+    async def start(self):
+        # Una frontera por listado: el general (clave "") o el de cada institución, que
+        # comparten la ventana de hojas en vuelo (ver `_siguientes_hojas`)
+        listados = self.instituciones or [""]
+        self.ventana_hojas = max(1, self.settings.getint("FRONTERA_VENTANA_HOJAS", 16))
+        # En modo por particiones (`main_scrapy(workers=N)`) cada proceso recorre una de cada N hojas
+        indice = self.settings.getint("PARTICION_INDICE", 0)
+        paso = self.settings.getint("PARTICION_TOTAL", 1)
+        self.fronteras = {
+            clave: FronteraHojas(ventana=self.ventana_hojas, inicio=indice % paso + 1, paso=paso) for clave in listados
+        }
+        self.perfiles_descubiertos: set[str] = set()
+        self.perfiles_completados: set[str] = set()
+        # Perfiles que fallaron en esta corrida y entran en la pasada diferida de reintentos
+        self.por_reintentar: set[str] = set()
+
+        if self.solo_fallidos:
+            self.fronteras = {}
+            pendientes = self.fallidos.pendientes()
+            self.logger.info(f"🔁 Reintentando {len(pendientes)} perfiles fallidos")
+            for perfil in pendientes:
+                yield self._solicitud_perfil(perfil.url)
+            return
+
+        if self.reanudar:
+            for clave, estado in self.reanudar["fronteras"].items():
+                if clave in self.fronteras:
+                    self.fronteras[clave].restaurar(estado)
+            self.total_pages = sum(frontera.total or 0 for frontera in self.fronteras.values())
+            self.total_funcionarios = self.total_pages * 20
+            self.perfiles_descubiertos = set(self.reanudar["perfiles"])
+            self.perfiles_completados = set(self.reanudar.get("completados", []))
+            if self.estado is not None:
+                # Los perfiles exportados en el intento anterior ya fueron registrados
+                self.estado.vistos.update(self.perfiles_completados)
+            pendientes = sorted(self.perfiles_descubiertos - self.perfiles_completados)
+            self.logger.info(
+                f"🔁 Reanudando: {self.hojas_completadas()} páginas y "
+                f"{len(self.perfiles_completados)} perfiles ya procesados, {len(pendientes)} perfiles pendientes"
+            )
+            for url in pendientes:
+                yield self._solicitud_perfil(url)
+
+        for request in self._siguientes_hojas():
+            yield request
+
+    def estado_checkpoint(self) -> dict:
+        """Estado de la crawl que guarda `CheckpointExtension`."""
+        return {
+            "fronteras": {clave: frontera.a_dict() for clave, frontera in self.fronteras.items()},
+            "perfiles": sorted(self.perfiles_descubiertos),
+            # Al reanudar, la base SQLite sigue registrando la misma corrida
+            "corrida": self.settings.get("SQLITE_CORRIDA"),
+        }
+
+    def _url_listado(self, institucion: str, hoja: int) -> str:
+        if institucion:
+            return self.institucion_url.format(base_url=self.base_url, institucion=institucion, hoja=hoja)
+        return self.listado_url.format(base_url=self.base_url, hoja=hoja)
+
+    def _siguientes_hojas(self):
+        """
+        Genera las solicitudes de las hojas que caben en la ventana, que es una sola para
+        todas las fronteras: con muchas instituciones nunca hay más de `FRONTERA_VENTANA_HOJAS`
+        hojas en vuelo.
+        """
+        libres = self.ventana_hojas - sum(len(frontera.en_vuelo) for frontera in self.fronteras.values())
+        for institucion, frontera in self.fronteras.items():
+            if libres <= 0:
+                return
+            hojas = frontera.siguientes(maximo=libres)
+            libres -= len(hojas)
+            for hoja in hojas:
+                yield scrapy.Request(
+                    self._url_listado(institucion, hoja),
+                    callback=self.parse,
+                    errback=self.hoja_fallida,
+                    meta={"hoja": hoja, "institucion": institucion},
+                )
 
     def parse(self, response: Response):
+        hoja = response.meta.get("hoja", 1)
+        institucion = response.meta.get("institucion", "")
+        frontera = self.fronteras[institucion]
+        listado = f"'{institucion}'" if institucion else "el listado general"
+
         # Extraer número aproximado de funcionarios según el número de páginas
-        self.total_pages = response.css('a[aria-label*="Última página"]::text').get()
-        self.total_funcionarios = int(self.total_pages) * 20
+        ultima_pagina = response.css('a[aria-label*="Última página"]::text').get()
+        if ultima_pagina and ultima_pagina.strip().isdigit() and frontera.total is None:
+            frontera.fijar_total(int(ultima_pagina))
+            self.total_pages = sum(f.total or 0 for f in self.fronteras.values())
+            self.total_funcionarios = self.total_pages * 20
+            self.logger.info(f"📄 {len(frontera.hojas)} de {frontera.total} páginas por recorrer en {listado}")
 
         # Extraer todos los URLs de los funcionarios
-        links = response.css(
-            "a.link-transition.flex.hover\\:no-underline.justify-between.items-center.mt-8::attr(href)"
-        ).getall()
+        tarjetas = response.css(
+            "a.link-transition.flex.hover\\:no-underline.justify-between.items-center.mt-8"
+        )
         page_links = 0
 
-        for href in links:
+        for tarjeta in tarjetas:
+            href = tarjeta.attrib.get("href", "")
             if "/institucion/" in href and "/funcionarios/" in href:
                 page_links += 1
-                yield response.follow(href, callback=self.parse_item)
+                url = response.urljoin(href)
+                if self.detalle != "todos":
+                    item = self._item_tarjeta(tarjeta.root, url)
+                    if item is not None:
+                        yield item
+                        continue
+                self.perfiles_descubiertos.add(url)
+                if url not in self.perfiles_completados:
+                    yield self._solicitud_perfil(url)
 
-        # Si encontramos funcionarios en esta página, probamos la siguiente
+        # Sin el total de páginas, probamos la siguiente mientras haya funcionarios; la primera
+        # hoja vacía fija el total
         if page_links > 0:
-            try:
-                current_sheet = int(response.url.split("sheet=")[-1])
-            except ValueError:
-                return
-            next_sheet = current_sheet + 1
-            next_url = f"https://www.gob.pe/funcionariospublicos?sheet={next_sheet}"
-            self.logger.info(f"➡️  Siguiente página: {next_sheet}")
-            yield scrapy.Request(next_url, callback=self.parse)
+            frontera.extender()
+        else:
+            frontera.cerrar(hoja)
+
+        frontera.completar(hoja)
+        por_recorrer = len(frontera.hojas) if frontera.hojas is not None else "?"
+        self.logger.info(f"➡️  Página {hoja} procesada en {listado} ({len(frontera.completadas)}/{por_recorrer})")
+        yield from self._siguientes_hojas()
+
+    def _item_tarjeta(self, nodo, url: str) -> dict | None:
+        """
+        Item que se exporta directamente desde la tarjeta del listado, o None si hay que
+        visitar el perfil (modo "cambios" y funcionario nuevo o con tarjeta distinta).
+        """
+        tarjeta = self.extractor_tarjeta.extraer(nodo, url)
+        self.crawler.stats.inc_value("listado/tarjetas")
+        if not tarjeta["nombre"] or not tarjeta["cargo"]:
+            # Probablemente cambió el marcado de las tarjetas y `TarjetaXPaths` ya no coincide
+            if not self.crawler.stats.get_value("listado/tarjetas_incompletas"):
+                self.logger.warning(f"⚠️ Tarjeta sin nombre o cargo en el listado ({url}); revisar `TarjetaXPaths`")
+            self.crawler.stats.inc_value("listado/tarjetas_incompletas")
+        if self.detalle == "ninguno":
+            return tarjeta
+        previo = self.estado.obtener(url)
+        if previo is None or previo.item is None or tarjeta_modificada(previo.item, tarjeta):
+            self.crawler.stats.inc_value("listado/perfiles_a_visitar")
+            return None
+        self.crawler.stats.inc_value("listado/sin_cambios")
+        return dict(previo.item)
+
+    def _solicitud_perfil(self, url: str) -> scrapy.Request:
+        headers, meta = {}, {}
+        if self.estado is not None:
+            # Revalidación condicional con ETag/Last-Modified de la corrida anterior
+            headers = self.estado.cabeceras_condicionales(url)
+            meta["handle_httpstatus_list"] = [304]
+        # Prioridad mayor que las hojas: los detalles se vacían antes de abrir más hojas
+        return scrapy.Request(
+            url, callback=self.parse_item, errback=self.perfil_fallido, headers=headers, meta=meta, priority=1
+        )
+
+    def solicitud_reintento(self, url: str) -> scrapy.Request:
+        """Solicitud de un perfil fallido para la pasada diferida de reintentos."""
+        request = self._solicitud_perfil(url).replace(dont_filter=True)
+        request.meta["download_slot"] = SLOT_FALLIDOS
+        return request
 
-    def parse_item(self, response: Response):
+    def perfil_fallido(self, failure):
+        url = failure.request.url
+        motivo = motivo_fallo(failure)
+        intentos = self.fallidos.registrar(url, motivo) if self.fallidos is not None else 1
+        self.crawler.stats.inc_value("fallidos/perfiles")
+        if not es_definitivo(failure):
+            self.por_reintentar.add(url)
+        self.logger.warning(f"❌ No se pudo obtener el perfil {url} ({motivo}, intentos: {intentos})")
+
+    def hoja_fallida(self, failure):
+        hoja = failure.request.meta["hoja"]
+        self.logger.error(f"❌ No se pudo obtener la página {hoja} ({failure.request.url}): {failure.value!r}")
+        self.fronteras[failure.request.meta.get("institucion", "")].liberar(hoja)
+        yield from self._siguientes_hojas()
+
+    async def parse_item(self, response: Response):
         url = response.url
         self.total_links += 1
-        self.logger.info(f"{self.total_links}/{self.total_funcionarios} -> {url}")
+        self.logger.debug(f"{self.total_links}/{self.total_funcionarios} -> {url}")
+        self.por_reintentar.discard(url)
+        if self.fallidos is not None and self.fallidos.resolver(url):
+            self.crawler.stats.inc_value("fallidos/recuperados")
 
-        resumen = response.xpath('//div[@class="leading-6"]//text()').getall()
-        # Limpiar espacios, saltos y \xa0
-        resumen_limpio = " ".join(
-            [t.strip().replace("\xa0", " ") for t in resumen if t.strip()]
-        )
+        if self.estado is not None:
+            previo = self.estado.obtener(url)
+            hash_contenido = huella(response.body)
+            # Perfil sin cambios: se reutiliza el último item sin volver a extraerlo
+            if previo is not None and previo.item is not None and (
+                response.status == 304 or previo.hash_contenido == hash_contenido
+            ):
+                self.crawler.stats.inc_value("incremental/sin_cambios")
+                yield dict(previo.item)
+                return
+            if response.status == 304:
+                self.logger.warning(f"Respuesta 304 sin item guardado: {url}")
+                return
+            self.estado.registrar_respuesta(
+                url,
+                hash_contenido,
+                etag=response.headers.get("ETag", b"").decode("latin-1") or None,
+                last_modified=response.headers.get("Last-Modified", b"").decode("latin-1") or None,
+            )
 
-        yield {
-            "nombre": response.xpath(self.xpaths.nombre).get(),
-            "institucion": response.xpath(self.xpaths.institucion).get(),
-            "cargo": response.xpath(self.xpaths.cargo).get(),
-            "fecha_inicio": response.xpath(self.xpaths.fecha_inicio).get(),
-            "correo": response.xpath(self.xpaths.correo).get(),
-            "telefono": response.xpath(self.xpaths.telefono).get(),
-            "resolucion": response.xpath(self.xpaths.resolucion).get(),
-            "url": url,
-            "resumen": resumen_limpio
-        }
+        if self.pool is not None:
+            item = await self.pool.extraer(response.body, url, response.encoding)
+        else:
+            with cronometro("extraccion"):
+                item = self.extractor.extraer(response.selector.root, url)
+        yield item
+
+    def closed(self, reason: str):
+        if incompletas := self.crawler.stats.get_value("listado/tarjetas_incompletas"):
+            self.logger.warning(
+                f"⚠️ {incompletas} de {self.crawler.stats.get_value('listado/tarjetas')} tarjetas sin nombre o cargo"
+            )
+        if self.estado is not None:
+            self.estado.cerrar()
+        if self.pool is not None:
+            self.pool.cerrar()
+        if self.fallidos is not None:
+            if len(self.fallidos):
+                self.logger.warning(
+                    f"🪦 {len(self.fallidos)} perfiles fallidos registrados; se pueden reintentar con `reintentar_fallidos`"
+                )
+            self.fallidos.cerrar()
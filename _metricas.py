@@ -0,0 +1,259 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (segundos) de los buckets de los histogramas
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histograma:
+    """Histograma de duraciones con buckets fijos, al estilo de Prometheus."""
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.conteos = [0] * (len(buckets) + 1)
+        self.n = 0
+        self.suma = 0.0
+
+    def observar(self, valor: float):
+        self.conteos[bisect_left(self.buckets, valor)] += 1
+        self.n += 1
+        self.suma += valor
+
+    def percentil(self, p: float) -> float | None:
+        """Aproximación del percentil `p` por el límite superior de su bucket."""
+        if not self.n:
+            return None
+        objetivo, acumulado = p / 100 * self.n, 0
+        for limite, conteo in zip(self.buckets + (float("inf"),), self.conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return limite
+        return float("inf")
+
+    def resumen(self) -> dict:
+        return {
+            "n": self.n,
+            "suma": self.suma,
+            "media": self.suma / self.n if self.n else None,
+            "p50": self.percentil(50),
+            "p99": self.percentil(99),
+        }
+
+
+# Registro de histogramas del proceso: lo alimentan la spider, los pipelines y los exportadores.
+# Solo se alimenta mientras `MetricasExtension` tiene una crawl abierta con `METRICAS_PATH`; si
+# no, `observar` y `cronometro` no hacen nada y el registro no crece entre crawls.
+REGISTRO: dict[str, Histograma] = {}
+_registrando = False
+
+
+def observar(nombre: str, segundos: float):
+    if not _registrando:
+        return
+    histograma = REGISTRO.get(nombre)
+    if histograma is None:
+        histograma = REGISTRO[nombre] = Histograma()
+    histograma.observar(segundos)
+
+
+@contextmanager
+def cronometro(nombre: str):
+    """Mide el bloque y lo registra en el histograma `nombre`."""
+    if not _registrando:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar(nombre, time.perf_counter() - inicio)
+
+
+def a_prometheus(contadores: dict[str, float]) -> str:
+    """Formato de texto de Prometheus para los contadores y los histogramas del registro."""
+    lineas = []
+    for nombre, valor in contadores.items():
+        lineas.append(f"funcionarios_{nombre} {valor}")
+    for nombre, histograma in REGISTRO.items():
+        metrica = f"funcionarios_{nombre}_segundos"
+        lineas.append(f"# TYPE {metrica} histogram")
+        acumulado = 0
+        for limite, conteo in zip(histograma.buckets, histograma.conteos):
+            acumulado += conteo
+            lineas.append(f'{metrica}_bucket{{le="{limite}"}} {acumulado}')
+        lineas.append(f'{metrica}_bucket{{le="+Inf"}} {histograma.n}')
+        lineas.append(f"{metrica}_sum {histograma.suma}")
+        lineas.append(f"{metrica}_count {histograma.n}")
+    return "\n".join(lineas) + "\n"
+
+
+class MetricasExtension:
+    """
+    Métricas por etapa de la crawl, con snapshots periódicos en `METRICAS_PATH`
+    (JSON o, si termina en `.prom`, formato de texto de Prometheus):
+
+    - latencia de descarga de hojas del listado y de perfiles, por separado
+    - tiempo de extracción XPath, de pipelines y de exportación (ver `REGISTRO`)
+    - items/s, profundidad de la cola del scheduler, solicitudes en el downloader y reintentos
+
+    Con `METRICAS_PERFILADO` activa cProfile en el hilo del reactor y, al cerrar, guarda el
+    perfil en `METRICAS_PERFIL_PATH` y registra en el log las funciones más costosas.
+    """
+
+    def __init__(self, crawler):
+        s = crawler.settings
+        self.ruta = s.get("METRICAS_PATH")
+        self.perfilado = s.getbool("METRICAS_PERFILADO")
+        if not self.ruta and not self.perfilado:
+            raise NotConfigured
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.intervalo = s.getfloat("METRICAS_INTERVALO", 30)
+        self.ruta_perfil = s.get("METRICAS_PERFIL_PATH") or "perfil_reactor.prof"
+        self.tarea = None
+        self.perfil = None
+        self.inicio = None
+        self._ultimo = (None, 0)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        ext = cls(crawler)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        return ext
+
+    def spider_opened(self, spider):
+        global _registrando
+        REGISTRO.clear()
+        _registrando = bool(self.ruta)
+        self.inicio = time.perf_counter()
+        self._ultimo = (self.inicio, 0)
+        if self.perfilado:
+            self.perfil = cProfile.Profile()
+            self.perfil.enable()
+        if self.ruta:
+            self.tarea = task.LoopingCall(self.snapshot)
+            self.tarea.start(self.intervalo, now=False)
+
+    def response_received(self, response, request, spider):
+        etapa = "listado" if "hoja" in request.meta else "perfil"
+        observar(f"descarga_{etapa}", request.meta.get("download_latency", 0.0))
+
+    def contadores(self) -> dict[str, float]:
+        ahora = time.perf_counter()
+        items = self.stats.get_value("item_scraped_count", 0)
+        instante_previo, items_previos = self._ultimo
+        self._ultimo = (ahora, items)
+        engine = self.crawler.engine
+        slot = getattr(engine, "_slot", None)
+        return {
+            "segundos": ahora - self.inicio,
+            "items": items,
+            "items_por_segundo": (items - items_previos) / max(ahora - instante_previo, 1e-9),
+            "items_por_segundo_promedio": items / max(ahora - self.inicio, 1e-9),
+            "cola_scheduler": len(slot.scheduler) if slot is not None else 0,
+            "descargas_activas": len(engine.downloader.active),
+            "reintentos": self.stats.get_value("retry/count", 0),
+            "errores_descarga": self.stats.get_value("downloader/exception_count", 0),
+        }
+
+    def snapshot(self):
+        contadores = self.contadores()
+        logger.info(
+            f"📊 {contadores['items']} items ({contadores['items_por_segundo']:.1f}/s) | "
+            f"cola {contadores['cola_scheduler']} | reintentos {contadores['reintentos']}"
+        )
+        ruta = Path(self.ruta)
+        if ruta.suffix == ".prom":
+            contenido = a_prometheus(contadores)
+        else:
+            contenido = json.dumps(
+                {**contadores, "histogramas": {n: h.resumen() for n, h in REGISTRO.items()}},
+                indent=2,
+            )
+        temporal = ruta.with_suffix(ruta.suffix + ".tmp")
+        temporal.write_text(contenido, encoding="utf-8")
+        os.replace(temporal, ruta)
+
+    def spider_closed(self, spider):
+        global _registrando
+        if self.tarea is not None and self.tarea.running:
+            self.tarea.stop()
+        if self.ruta:
+            self.snapshot()
+        _registrando = False
+        REGISTRO.clear()
+        if self.perfil is not None:
+            self.perfil.disable()
+            self.perfil.dump_stats(self.ruta_perfil)
+            salida = io.StringIO()
+            pstats.Stats(self.perfil, stream=salida).sort_stats("cumulative").print_stats(25)
+            logger.info(f"🔬 Perfil del reactor guardado en {self.ruta_perfil}\n{salida.getvalue()}")
+
+
+def _metricas_activas(settings) -> bool:
+    return bool(settings.get("METRICAS_PATH")) or settings.getbool("METRICAS_PERFILADO")
+
+
+# Instante en que cada item en curso entró a los pipelines (por id del item). Una entrada vive
+# solo mientras el item está en los pipelines: la quita `FinPipelinesMetricas` o, si el item se
+# descarta o falla antes, `InicioPipelinesMetricas.item_descartado`; así un id reutilizado por
+# otro objeto nunca encuentra un instante viejo.
+_inicio_pipelines: dict[int, float] = {}
+
+
+class InicioPipelinesMetricas:
+    """
+    Primer pipeline: marca la entrada del item (ver `FinPipelinesMetricas`). Solo se activa
+    con `METRICAS_PATH` o `METRICAS_PERFILADO`.
+    """
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not _metricas_activas(crawler.settings):
+            raise NotConfigured
+        pipeline = cls()
+        crawler.signals.connect(pipeline.item_descartado, signal=signals.item_dropped)
+        crawler.signals.connect(pipeline.item_descartado, signal=signals.item_error)
+        crawler.signals.connect(pipeline.spider_closed, signal=signals.spider_closed)
+        return pipeline
+
+    def process_item(self, item, spider):
+        _inicio_pipelines[id(item)] = time.perf_counter()
+        return item
+
+    def item_descartado(self, item, spider, **kwargs):
+        _inicio_pipelines.pop(id(item), None)
+
+    def spider_closed(self, spider):
+        _inicio_pipelines.clear()
+
+
+class FinPipelinesMetricas:
+    """Último pipeline: registra en `REGISTRO["pipelines"]` el tiempo total de los pipelines."""
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not _metricas_activas(crawler.settings):
+            raise NotConfigured
+        return cls()
+
+    def process_item(self, item, spider):
+        inicio = _inicio_pipelines.pop(id(item), None)
+        if inicio is not None:
+            observar("pipelines", time.perf_counter() - inicio)
+        return item
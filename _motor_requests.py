@@ -0,0 +1,287 @@
+"""
+Motor ligero sin Scrapy, basado en `requests` y un pool de hilos.
+
+Pensado para corridas pequeñas o puntuales (unas pocas hojas o instituciones), donde el
+arranque de Scrapy y del reactor pesa más que la propia crawl. Usa el mismo extractor
+(`FuncionarioXPaths`) y la misma normalización que la spider, y escribe el mismo CSV.
+
+Uso:
+    python _motor_requests.py salida.csv --paginas 3
+    python _motor_requests.py ceplan.csv --institucion ceplan --workers 8
+"""
+import argparse
+import csv
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import urljoin
+import requests
+from lxml import etree, html
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from _extractor import CAMPOS, ExtractorFuncionario, FuncionarioXPaths
+from _normalizacion import Normalizador
+import _settings as pkg_settings
+
+logger = logging.getLogger(__name__)
+
+# Mismos selectores que `FuncionariosSpider.parse`, en XPath
+_TARJETAS = etree.XPath(
+    '//a[contains(@class, "link-transition") and contains(@class, "justify-between") '
+    'and contains(@class, "mt-8")]/@href',
+    smart_strings=False,
+)
+_ULTIMA_PAGINA = etree.XPath('//a[contains(@aria-label, "Última página")]/text()', smart_strings=False)
+
+_FIN = object()
+
+
+def _codificacion(respuesta: requests.Response) -> str:
+    # Sin charset en Content-Type, requests supone ISO-8859-1; gob.pe sirve UTF-8
+    if "charset" in respuesta.headers.get("Content-Type", "").lower():
+        return respuesta.encoding
+    return "utf-8"
+
+
+class MotorRequests:
+    """
+    Recorre el directorio con sesiones HTTP persistentes (keep-alive y reintentos con espera
+    creciente) y dos etapas encadenadas: los hilos del listado encolan cada perfil en cuanto
+    leen su hoja, y los hilos de perfiles los descargan y extraen mientras el listado sigue,
+    en lugar de esperar a tener todas las URLs.
+
+    Como máximo `en_vuelo` perfiles esperan en la cola y `en_vuelo` funcionarios extraídos
+    esperan al consumidor; si alguna se llena, las etapas anteriores se detienen hasta que
+    haya lugar, así un consumidor lento no acumula el directorio en memoria.
+    """
+
+    listado_url = "{base_url}/funcionariospublicos?sheet={hoja}"
+    institucion_url = "{base_url}/institucion/{institucion}/funcionarios?sheet={hoja}"
+
+    def __init__(
+        self,
+        workers: int = 16,
+        workers_listado: int = 4,
+        en_vuelo: int = 256,
+        base_url: str = pkg_settings.DIRECTORIO_BASE_URL,
+        instituciones: list[str] | None = None,
+        reintentos: int = pkg_settings.RETRY_TIMES,
+        timeout: float = pkg_settings.DOWNLOAD_TIMEOUT,
+        xpaths: FuncionarioXPaths = FuncionarioXPaths(),
+    ):
+        self.workers = max(1, workers)
+        self.workers_listado = max(1, workers_listado)
+        self.en_vuelo = max(1, en_vuelo)
+        self.base_url = base_url.rstrip("/")
+        self.instituciones = [slug.strip().strip("/").lower() for slug in instituciones or [] if slug.strip()]
+        self.reintentos = reintentos
+        self.timeout = timeout
+        self.xpaths = xpaths
+        self.normalizador = Normalizador(pkg_settings.NORMALIZACION_CACHE)
+        self.estadisticas = {"hojas": 0, "perfiles": 0, "fallidos": 0}
+        # Sesión y extractor por hilo: cada hilo reutiliza su conexión y sus XPath compilados
+        self._local = threading.local()
+
+    def _sesion(self) -> requests.Session:
+        sesion = getattr(self._local, "sesion", None)
+        if sesion is None:
+            sesion = requests.Session()
+            sesion.headers["User-Agent"] = pkg_settings.USER_AGENT
+            reintentos = Retry(
+                total=self.reintentos,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET",),
+                raise_on_status=False,
+            )
+            adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=reintentos)
+            sesion.mount("http://", adaptador)
+            sesion.mount("https://", adaptador)
+            self._local.sesion = sesion
+        return sesion
+
+    def _extractor(self) -> ExtractorFuncionario:
+        extractor = getattr(self._local, "extractor", None)
+        if extractor is None:
+            extractor = self._local.extractor = ExtractorFuncionario(self.xpaths)
+        return extractor
+
+    def _descargar(self, url: str) -> requests.Response | None:
+        try:
+            respuesta = self._sesion().get(url, timeout=self.timeout)
+            respuesta.raise_for_status()
+            return respuesta
+        except requests.RequestException as e:
+            logger.warning(f"❌ No se pudo obtener {url}: {e}")
+            return None
+
+    def _url_listado(self, institucion: str, hoja: int) -> str:
+        if institucion:
+            return self.institucion_url.format(base_url=self.base_url, institucion=institucion, hoja=hoja)
+        return self.listado_url.format(base_url=self.base_url, hoja=hoja)
+
+    def iter_funcionarios(self, paginas: int | None = None) -> Iterator[dict]:
+        """
+        Devuelve los funcionarios normalizados a medida que se extraen. Con `paginas`, recorre
+        como máximo esas hojas de cada listado.
+        """
+        resultados: queue.Queue = queue.Queue(maxsize=self.en_vuelo)
+        cupo = threading.BoundedSemaphore(self.en_vuelo)
+        cancelado = threading.Event()
+        vistos: set[str] = set()
+        lock = threading.Lock()
+        pendientes = 0
+
+        listado = ThreadPoolExecutor(self.workers_listado, thread_name_prefix="listado")
+        perfiles = ThreadPoolExecutor(self.workers, thread_name_prefix="perfil")
+
+        def entregar(valor):
+            # Espera lugar en `resultados` (o sale si el consumidor dejó de leer)
+            while not cancelado.is_set():
+                try:
+                    resultados.put(valor, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+
+        def liberar():
+            nonlocal pendientes
+            with lock:
+                pendientes -= 1
+                terminado = pendientes == 0
+            if terminado:
+                entregar(_FIN)
+
+        def enviar(ejecutor: ThreadPoolExecutor, funcion, *args):
+            nonlocal pendientes
+            with lock:
+                pendientes += 1
+            ejecutor.submit(tarea, funcion, *args)
+
+        def tarea(funcion, *args):
+            # Cada tarea encola sus resultados y las tareas que genera antes de terminar, así
+            # que `pendientes` solo llega a 0 cuando ya no queda nada por hacer
+            try:
+                if not cancelado.is_set():
+                    funcion(*args)
+            except Exception:
+                logger.exception(f"Error en {funcion.__name__}{args}")
+            finally:
+                liberar()
+
+        def hoja(institucion: str, numero: int, ultima: int | None):
+            respuesta = self._descargar(self._url_listado(institucion, numero))
+            if respuesta is None:
+                return
+            root = html.fromstring(respuesta.content)
+            with lock:
+                self.estadisticas["hojas"] += 1
+            enlaces = [h for h in _TARJETAS(root) if "/institucion/" in h and "/funcionarios/" in h]
+
+            if numero == 1:
+                texto = _ULTIMA_PAGINA(root)
+                total = int(texto[0].strip()) if texto and texto[0].strip().isdigit() else None
+                ultima = min(total, paginas) if total and paginas else total or paginas
+                if ultima is not None:
+                    logger.info(f"📄 {ultima} páginas por recorrer en {institucion or 'el listado general'}")
+                    for siguiente in range(2, ultima + 1):
+                        enviar(listado, hoja, institucion, siguiente, ultima)
+            # Sin el total de páginas, probamos la siguiente mientras haya funcionarios
+            if ultima is None and enlaces:
+                enviar(listado, hoja, institucion, numero + 1, None)
+
+            for href in enlaces:
+                url = urljoin(respuesta.url, href)
+                with lock:
+                    if url in vistos:
+                        continue
+                    vistos.add(url)
+                # Espera si hay demasiados perfiles en cola (o sale si se canceló la corrida)
+                while not cupo.acquire(timeout=0.5):
+                    if cancelado.is_set():
+                        return
+                enviar(perfiles, perfil, url)
+
+        def perfil(url: str):
+            try:
+                respuesta = self._descargar(url)
+                if respuesta is None:
+                    with lock:
+                        self.estadisticas["fallidos"] += 1
+                    return
+                entregar(self._extractor().extraer_html(respuesta.content, url, _codificacion(respuesta)))
+            finally:
+                cupo.release()
+
+        def sembrar():
+            for institucion in self.instituciones or [""]:
+                enviar(listado, hoja, institucion, 1, None)
+
+        # La siembra es una tarea más: mientras no termine, `pendientes` no puede llegar a 0
+        # aunque las tareas de la primera institución acaben antes de sembrar la siguiente.
+        # Corre en un hilo del pool para que `_FIN` nunca lo tenga que encolar el consumidor.
+        enviar(listado, sembrar)
+        try:
+            while (item := resultados.get()) is not _FIN:
+                self.estadisticas["perfiles"] += 1
+                yield self.normalizador.normalizar(item)
+        finally:
+            cancelado.set()
+            listado.shutdown(wait=True, cancel_futures=True)
+            perfiles.shutdown(wait=True, cancel_futures=True)
+
+
+def main_requests(
+    output_path: str | Path = "salida.csv",
+    paginas: int | None = None,
+    workers: int = 16,
+    instituciones: list[str] | None = None,
+    base_url: str = pkg_settings.DIRECTORIO_BASE_URL,
+) -> int:
+    """
+    Recorre el directorio con `MotorRequests` y escribe los funcionarios en `output_path`, con
+    el mismo formato que `main_scrapy` (CSV UTF-8 con BOM, delimitador `;` y las mismas
+    columnas). Devuelve el número de funcionarios escritos.
+
+    Conviene para corridas pequeñas (`paginas` o `instituciones`); para el directorio completo,
+    `main_scrapy` ofrece modo incremental, reanudación, reintentos diferidos y métricas.
+    """
+    output_path = Path(output_path)
+    if output_path.suffix.lower() != ".csv":
+        raise ValueError("El motor ligero solo admite salidas CSV")
+    inicio = time.perf_counter()
+    motor = MotorRequests(workers=workers, base_url=base_url, instituciones=instituciones)
+    escritos = 0
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8-sig", newline="") as archivo:
+        escritor = csv.DictWriter(archivo, fieldnames=CAMPOS, delimiter=";")
+        escritor.writeheader()
+        for item in motor.iter_funcionarios(paginas):
+            escritor.writerow(item)
+            escritos += 1
+    segundos = time.perf_counter() - inicio
+    logger.info(
+        f"✅ {escritos} funcionarios ({motor.estadisticas['hojas']} páginas, "
+        f"{motor.estadisticas['fallidos']} perfiles fallidos) en {segundos:.1f} s -> {output_path}"
+    )
+    return escritos
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("salida", type=Path)
+    parser.add_argument("--paginas", type=int, help="hojas por listado como máximo")
+    parser.add_argument("--workers", type=int, default=16, help="hilos de descarga de perfiles")
+    parser.add_argument("--institucion", action="append", dest="instituciones", metavar="SLUG")
+    parser.add_argument("--base-url", default=pkg_settings.DIRECTORIO_BASE_URL)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(name)s] %(levelname)s: %(message)s")
+    main_requests(args.salida, args.paginas, args.workers, args.instituciones, args.base_url)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import re
+import unicodedata
+from datetime import date
+from functools import lru_cache
+
+MESES = {
+    "ene": 1, "feb": 2, "mar": 3, "abr": 4, "may": 5, "jun": 6,
+    "jul": 7, "ago": 8, "set": 9, "sep": 9, "oct": 10, "nov": 11, "dic": 12,
+}
+
+_ESPACIOS = re.compile(r"\s+")
+_FECHA = re.compile(r"^(\d{1,2})\s+([^\W\d_]+)\.?\s+(\d{4})$")
+_FECHA_ISO = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+_ANEXO = re.compile(r"\b(?:anexo|anx|ext)\.?\s*:?\s*(\d+)", re.IGNORECASE)
+_NUMERO_RESOLUCION = re.compile(r"\bN(?:\.\s*)?(?:[°º]\.?|o\.)(?=\s*\d)", re.IGNORECASE)
+
+
+def normalizar_fecha(texto: str) -> str | None:
+    """
+    Convierte una fecha 'dd mmm yyyy' (meses en español) o ya en formato 'yyyy-mm-dd' al
+    formato estándar 'yyyy-mm-dd'. Devuelve None si no se puede interpretar.
+    """
+    texto = _ESPACIOS.sub(" ", texto.replace("\xa0", " ")).strip().lower()
+    coincidencia = _FECHA_ISO.match(texto)
+    if coincidencia:
+        anio, mes, dia = map(int, coincidencia.groups())
+    else:
+        coincidencia = _FECHA.match(texto)
+        if coincidencia is None or coincidencia.group(2)[:3] not in MESES:
+            return None
+        dia, anio = int(coincidencia.group(1)), int(coincidencia.group(3))
+        mes = MESES[coincidencia.group(2)[:3]]
+    try:
+        return date(anio, mes, dia).isoformat()
+    except ValueError:
+        return None
+
+
+def normalizar_telefono(texto: str) -> str | None:
+    """
+    Deja solo los dígitos del número (con '+' si tiene prefijo internacional) y el anexo,
+    p. ej. '(01) 311-7700 anexo 123' -> '013117700 anexo 123'.
+    """
+    anexo = _ANEXO.search(texto)
+    numero = texto[: anexo.start()] if anexo else texto
+    digitos = re.sub(r"\D", "", numero)
+    if not digitos:
+        return None
+    if numero.strip().startswith("+"):
+        digitos = "+" + digitos
+    return f"{digitos} anexo {anexo.group(1)}" if anexo else digitos
+
+
+def normalizar_correo(texto: str) -> str | None:
+    """Correo en minúsculas, sin espacios ni prefijo 'mailto:'."""
+    correo = _ESPACIOS.sub("", texto).lower().removeprefix("mailto:")
+    return correo if "@" in correo else None
+
+
+def normalizar_resolucion(texto: str) -> str | None:
+    """Colapsa espacios y unifica las variantes de 'N°' (Nº, N.º, No.)."""
+    resolucion = _ESPACIOS.sub(" ", texto.replace("\xa0", " ")).strip()
+    return _NUMERO_RESOLUCION.sub("N°", resolucion) or None
+
+
+def clave_busqueda(texto: str) -> str:
+    """Forma de comparación de nombres: sin tildes, en minúsculas y con espacios simples."""
+    texto = unicodedata.normalize("NFKD", texto.replace("\xa0", " "))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return _ESPACIOS.sub(" ", texto).strip().lower()
+
+
+NORMALIZADORES = {
+    "fecha_inicio": normalizar_fecha,
+    "telefono": normalizar_telefono,
+    "correo": normalizar_correo,
+    "resolucion": normalizar_resolucion,
+}
+
+
+class Normalizador:
+    """
+    Normaliza items de funcionarios con cachés acotadas por campo: los mismos textos
+    (fechas, teléfonos institucionales, resoluciones) se repiten miles de veces entre los
+    ~35 000 registros, así que cada valor distinto se procesa una sola vez.
+    """
+
+    def __init__(self, tamano_cache: int = 4096):
+        self.funciones = {
+            campo: lru_cache(maxsize=tamano_cache)(funcion) for campo, funcion in NORMALIZADORES.items()
+        }
+        self.no_parseables = {campo: 0 for campo in NORMALIZADORES}
+
+    def normalizar(self, item) -> dict:
+        """Normaliza un item en su lugar y lo devuelve."""
+        for k, v in item.items():
+            if isinstance(v, str):
+                v = v.strip()
+                if k in self.funciones and v:
+                    normalizado = self.funciones[k](v)
+                    if normalizado is None:
+                        self.no_parseables[k] += 1
+                    v = normalizado
+                item[k] = v
+        return item
+
+    def contadores(self) -> dict[str, int]:
+        """Aciertos y fallos de caché y valores no interpretables, por campo."""
+        contadores = {}
+        for campo, funcion in self.funciones.items():
+            info = funcion.cache_info()
+            contadores[f"{campo}/cache_hits"] = info.hits
+            contadores[f"{campo}/cache_misses"] = info.misses
+            contadores[f"{campo}/no_parseables"] = self.no_parseables[campo]
+        return contadores
@@ -0,0 +1,148 @@
+import logging
+import multiprocessing
+import queue
+import shutil
+import time
+from pathlib import Path
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+from _checkpoint import fusionar_partes
+
+logger = logging.getLogger(__name__)
+
+# Cola hacia el proceso principal; solo existe dentro de un proceso de partición. No puede ir
+# en los settings porque Scrapy los copia con deepcopy y las colas no se pueden copiar.
+_cola = None
+
+
+class ProgresoParticion:
+    """
+    Dentro de cada proceso de `main_scrapy(workers=N)`, envía al proceso principal el avance
+    de la partición cada `PARTICION_INTERVALO` segundos y un resumen al cerrar la spider.
+    """
+
+    def __init__(self, crawler, cola, intervalo: float):
+        self.crawler = crawler
+        self.cola = cola
+        self.indice = crawler.settings.getint("PARTICION_INDICE", 0)
+        self.intervalo = intervalo
+        self.inicio = None
+        self.tarea = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if _cola is None:
+            raise NotConfigured
+        ext = cls(crawler, _cola, crawler.settings.getfloat("PARTICION_INTERVALO", 10))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.inicio = time.perf_counter()
+        self.tarea = task.LoopingCall(self.enviar, spider)
+        self.tarea.start(self.intervalo, now=False)
+
+    def spider_closed(self, spider, reason):
+        if self.tarea is not None and self.tarea.running:
+            self.tarea.stop()
+        self.enviar(spider, motivo=reason)
+
+    def enviar(self, spider, motivo: str | None = None):
+        iniciada = getattr(spider, "fronteras", None) is not None
+        self.cola.put(
+            {
+                "particion": self.indice,
+                "items": self.crawler.stats.get_value("item_scraped_count", 0),
+                "hojas": spider.hojas_completadas() if iniciada else 0,
+                "hojas_total": spider.hojas_por_recorrer() if iniciada else None,
+                "listado_completo": iniciada and spider.listado_completo,
+                "segundos": time.perf_counter() - self.inicio,
+                "motivo": motivo,
+            }
+        )
+
+
+def _ejecutar_particion(indice: int, cola, parametros: dict):
+    """Punto de entrada de cada proceso: corre `main_scrapy` con los parámetros de la partición."""
+    global _cola
+    _cola = cola
+    from _spider_function import main_scrapy
+
+    parametros["settings"] = {
+        **parametros.get("settings", {}),
+        "PARTICION_INDICE": indice,
+        "LOG_FORMAT": f"%(asctime)s [particion {indice}] [%(name)s] %(levelname)s: %(message)s",
+    }
+    main_scrapy(**parametros)
+
+
+def _registrar(progreso: dict):
+    estado = f" ({progreso['motivo']})" if progreso["motivo"] else ""
+    logger.info(
+        f"🧩 Partición {progreso['particion']}{estado}: {progreso['items']} items, "
+        f"{progreso['hojas']}/{progreso['hojas_total'] or '?'} páginas, {progreso['segundos']:.0f} s"
+    )
+
+
+def ejecutar_particiones(parametros: list[dict], destino: str | Path) -> int:
+    """
+    Corre una crawl por cada elemento de `parametros` (argumentos de `main_scrapy`), cada una
+    en su propio proceso, y une sus salidas CSV en `destino`, sin URLs repetidas y ordenadas
+    por `url`. Devuelve el número de funcionarios escritos.
+
+    Si alguna partición falla, no termina o no recorre todas sus hojas del listado, no se toca
+    `destino` y se conservan las salidas de cada partición para revisarlas.
+    """
+    contexto = multiprocessing.get_context("spawn")
+    cola = contexto.Queue()
+    procesos = [
+        contexto.Process(
+            target=_ejecutar_particion, args=(i, cola, p), name=f"particion-{i}"
+        )
+        for i, p in enumerate(parametros)
+    ]
+    for proceso in procesos:
+        proceso.start()
+    logger.info(f"🧩 {len(procesos)} particiones en ejecución")
+
+    progreso: dict[int, dict] = {}
+    while any(proceso.is_alive() for proceso in procesos):
+        try:
+            mensaje = cola.get(timeout=1)
+        except queue.Empty:
+            continue
+        progreso[mensaje["particion"]] = mensaje
+        if mensaje["motivo"] is None:
+            _registrar(mensaje)
+    for proceso in procesos:
+        proceso.join()
+    while True:
+        try:
+            mensaje = cola.get_nowait()
+        except queue.Empty:
+            break
+        progreso[mensaje["particion"]] = mensaje
+
+    fallidas = []
+    for i, proceso in enumerate(procesos):
+        final = progreso.get(i)
+        if final is not None:
+            _registrar(final)
+        if proceso.exitcode != 0 or final is None or final["motivo"] != "finished":
+            fallidas.append(i)
+        elif not final["listado_completo"]:
+            # Terminó "bien" pero sin todas sus hojas: su salida dejaría huecos en la unión
+            logger.error(f"🧩 Partición {i}: listado incompleto")
+            fallidas.append(i)
+    partes = [Path(p["output_path"]) for p in parametros]
+    if fallidas:
+        raise RuntimeError(
+            f"Particiones sin terminar: {fallidas}. Las salidas parciales quedan en {partes[0].parent}"
+        )
+
+    escritos = fusionar_partes(partes, destino, ordenar=True)
+    shutil.rmtree(partes[0].parent)
+    logger.info(f"🧩 {escritos} funcionarios unidos en {destino}")
+    return escritos
@@ -1,32 +1,100 @@
-from datetime import datetime
-
-def convertir_fecha(fecha_texto: str):
-    """Convierte una fecha en formato 'dd mmm yyyy' a datetime en formato estándar."""
-    meses = {
-        "ene": "Jan", "feb": "Feb", "mar": "Mar", "abr": "Apr",
-        "may": "May", "jun": "Jun", "jul": "Jul", "ago": "Aug",
-        "set": "Sep", "sep": "Sep", "oct": "Oct", "nov": "Nov", "dic": "Dec"
-    }
-    # Reemplazar el nombre del mes en español por su equivalente en inglés
-    for mes_es, mes_en in meses.items():
-        if mes_es in fecha_texto:
-            fecha_texto = fecha_texto.replace(mes_es, mes_en)
-            break
-
-    try:
-        return datetime.strptime(fecha_texto, "%d %b %Y").strftime("%Y-%m-%d")
-    except ValueError:
-        return None 
-
-
-class FechaPipeline:
+from pathlib import Path
+from _exporters import SemiColonCsvItemExporter
+from _extractor import CAMPOS
+from _normalizacion import Normalizador
+from _utils import en_hilo
+
+class NormalizacionPipeline:
+    """
+    Quita espacios de todos los textos y lleva `fecha_inicio`, `telefono`, `correo` y
+    `resolucion` a una forma canónica, con cachés acotadas por campo.
+    Al cerrar publica en las estadísticas de Scrapy los aciertos de caché y los valores que
+    no se pudieron interpretar (`normalizacion/<campo>/...`).
+    """
+    def __init__(self, stats, tamano_cache: int = 4096):
+        self.stats = stats
+        self.normalizador = Normalizador(tamano_cache)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats, crawler.settings.getint("NORMALIZACION_CACHE", 4096))
+
     def process_item(self, item, spider):
-        # Quitar espacios en blanco
-        for k, v in item.items():
-            if isinstance(v, str):
-                item[k] = v.strip()
-
-        # Convertir a fecha
-        if "fecha_inicio" in item and item["fecha_inicio"]:
-            item["fecha_inicio"] = convertir_fecha(item["fecha_inicio"])
-        return item
\ No newline at end of file
+        return self.normalizador.normalizar(item)
+
+    def close_spider(self, spider):
+        for clave, valor in self.normalizador.contadores().items():
+            self.stats.set_value(f"normalizacion/{clave}", valor)
+
+
+class IncrementalPipeline:
+    """
+    Registra cada item en el estado incremental de la spider y escribe el feed delta
+    (funcionarios nuevos, modificados y eliminados respecto a la corrida anterior).
+
+    `process_item` es una corrutina: la escritura en SQLite corre en un hilo aparte para no
+    detener el reactor mientras se descargan otros perfiles.
+    """
+    def __init__(self, delta_path: str | Path | None, reanudar: bool = False):
+        self.delta_path = delta_path
+        self.reanudar = reanudar
+        self.archivo = None
+        self.exporter = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            crawler.settings.get("INCREMENTAL_DELTA_PATH"),
+            crawler.settings.getbool("INCREMENTAL_DELTA_REANUDAR"),
+        )
+
+    def open_spider(self, spider):
+        if getattr(spider, "estado", None) is None or not self.delta_path:
+            return
+        delta_path = Path(self.delta_path)
+        delta_path.parent.mkdir(parents=True, exist_ok=True)
+        # Al reanudar una crawl interrumpida se continúa el delta del intento anterior
+        continuar = self.reanudar and delta_path.exists() and delta_path.stat().st_size > 0
+        self.archivo = open(delta_path, "ab" if continuar else "wb")
+        self.exporter = SemiColonCsvItemExporter(
+            self.archivo,
+            encoding="utf-8-sig",
+            include_headers_line=not continuar,
+            fields_to_export=["cambio", *CAMPOS],
+        )
+        self.exporter.start_exporting()
+        # Una corrida sin cambios deja igual un delta con cabecera
+        self.exporter.escribir_cabecera()
+
+    async def process_item(self, item, spider):
+        if getattr(spider, "estado", None) is None:
+            return item
+        cambio = await en_hilo(spider.estado.registrar_item, item["url"], dict(item))
+        if cambio:
+            spider.crawler.stats.inc_value(f"incremental/{cambio}")
+            if self.exporter is not None:
+                self.exporter.export_item({"cambio": cambio, **item})
+        return item
+
+    def close_spider(self, spider):
+        if getattr(spider, "estado", None) is None:
+            return
+        # Solo se puede afirmar que un funcionario fue eliminado si se recorrió todo el listado
+        if spider.listado_completo:
+            # Un perfil que figura en el listado no fue eliminado aunque no se haya podido
+            # descargar (o siga pendiente de reintento)
+            spider.estado.vistos.update(spider.perfiles_descubiertos)
+            spider.estado.vistos.update(spider.por_reintentar)
+            eliminados = spider.estado.eliminados(spider.instituciones)
+            spider.crawler.stats.set_value("incremental/eliminado", len(eliminados))
+            if self.exporter is not None:
+                for perfil in eliminados:
+                    self.exporter.export_item({"cambio": "eliminado", **perfil.item})
+            spider.estado.purgar([perfil.url for perfil in eliminados])
+        else:
+            spider.logger.warning("Listado incompleto: no se registran funcionarios eliminados")
+
+        if self.exporter is None:
+            return
+        self.exporter.finish_exporting()
+        self.archivo.close()
@@ -0,0 +1,74 @@
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import defer
+from _extractor import FuncionarioXPaths, ExtractorFuncionario
+from _metricas import observar
+
+# Extractor de cada proceso del pool (lo crea `_iniciar_proceso`)
+_extractor: ExtractorFuncionario | None = None
+
+
+def _iniciar_proceso(xpaths: FuncionarioXPaths):
+    global _extractor
+    _extractor = ExtractorFuncionario(xpaths)
+
+
+def _extraer(body: bytes, url: str, encoding: str) -> tuple[dict, float]:
+    """Se ejecuta en el proceso del pool: devuelve el item y el tiempo de extracción."""
+    inicio = time.perf_counter()
+    item = _extractor.extraer_html(body, url, encoding)
+    return item, time.perf_counter() - inicio
+
+
+def _a_deferred(futuro: Future) -> defer.Deferred:
+    """Deferred que se resuelve en el hilo del reactor cuando termina `futuro`."""
+    # Importado aquí para no instalar el reactor por defecto antes que Scrapy
+    from twisted.internet import reactor
+
+    d = defer.Deferred()
+
+    def terminado(f: Future):
+        error = f.exception()
+        if error is not None:
+            reactor.callFromThread(d.errback, error)
+        else:
+            reactor.callFromThread(d.callback, f.result())
+
+    futuro.add_done_callback(terminado)
+    return d
+
+
+class PoolExtraccion:
+    """
+    Pool de procesos que extrae los perfiles fuera del hilo del reactor, para que el parseo
+    use varios núcleos mientras las descargas siguen su curso.
+
+    Como máximo `en_vuelo` documentos se envían al pool a la vez; el resto espera su turno,
+    así que la memoria ocupada por cuerpos pendientes queda acotada.
+    """
+
+    def __init__(self, procesos: int, en_vuelo: int = 64, xpaths: FuncionarioXPaths = FuncionarioXPaths()):
+        self.ejecutor = ProcessPoolExecutor(
+            max_workers=procesos,
+            # spawn: no se puede hacer fork de un proceso con el reactor y sus hilos en marcha
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_iniciar_proceso,
+            initargs=(xpaths,),
+        )
+        self.semaforo = defer.DeferredSemaphore(max(1, en_vuelo))
+
+    async def extraer(self, body: bytes, url: str, encoding: str = "utf-8") -> dict:
+        """Extrae el item de un perfil en el pool, esperando turno si el pool está lleno."""
+        await maybe_deferred_to_future(self.semaforo.acquire())
+        try:
+            futuro = self.ejecutor.submit(_extraer, body, url, encoding)
+            item, segundos = await maybe_deferred_to_future(_a_deferred(futuro))
+        finally:
+            self.semaforo.release()
+        observar("extraccion", segundos)
+        return item
+
+    def cerrar(self):
+        self.ejecutor.shutdown(wait=True, cancel_futures=True)
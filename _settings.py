@@ -1,3 +1,7 @@
+import importlib.util
+import os
+import sys
+
 BOT_NAME = "funcionarios_publicos"
 LOG_ENABLED = True
 LOG_LEVEL = "INFO"
@@ -9,6 +13,15 @@ ROBOTSTXT_OBEY = False
 # CONCURRENT_REQUESTS_PER_DOMAIN = 25
 # DOWNLOAD_DELAY = 0.0
 
+# Sitio del directorio (se reemplaza en los benchmarks por un servidor local)
+DIRECTORIO_BASE_URL = "https://www.gob.pe"
+
+# Slugs de instituciones a recorrer (p. ej. ["ceplan", "minsa"]); vacío = listado general
+DIRECTORIO_INSTITUCIONES = []
+
+# Frontera de hojas del listado: número máximo de hojas en vuelo a la vez
+FRONTERA_VENTANA_HOJAS = 16
+
 USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
@@ -21,21 +34,114 @@ AUTOTHROTTLE_ENABLED = False
 # AUTOTHROTTLE_MAX_DELAY = 2.0
 # AUTOTHROTTLE_TARGET_CONCURRENCY = 3.0
 
+# Concurrencia adaptativa (la activa `main_scrapy(concurrencia_adaptativa=True)`):
+# ajusta las solicitudes en vuelo entre MIN y MAX según latencia y tasa de errores
+ADAPTATIVA_ENABLED = False
+ADAPTATIVA_MIN = 4
+ADAPTATIVA_INICIAL = 8
+ADAPTATIVA_INTERVALO = 5
+ADAPTATIVA_ERROR_MAX = 0.05
+ADAPTATIVA_FACTOR_LATENCIA = 2.0
+ADAPTATIVA_PASO = 2
+ADAPTATIVA_DECAIMIENTO = 0.1  # fracción en que la latencia de referencia sigue a cada ventana
+
 # Retries / timeouts
 RETRY_ENABLED = True
 RETRY_TIMES = 2
 DOWNLOAD_TIMEOUT = 15
 
-# Cache HTTP (desarrollo)
+# Perfiles fallidos: registro persistente (lo fija `main_scrapy`: `<salida>_fallidos.sqlite3`) y
+# pasada diferida de reintentos al final de la crawl, más lenta, con esperas que se duplican
+FALLIDOS_PATH = None
+FALLIDOS_SOLO = False  # solo reintentar los perfiles registrados (`reintentar_fallidos`)
+FALLIDOS_PASADAS = 3  # 0 = sin pasada diferida
+FALLIDOS_ESPERA = 10  # segundos antes de la primera pasada
+FALLIDOS_CONCURRENCIA = 2
+FALLIDOS_DEMORA = 0.5  # segundos entre solicitudes de la pasada
+
+# Cache HTTP (desarrollo): un solo archivo SQLite comprimido por spider
 HTTPCACHE_ENABLED = True
-HTTPCACHE_EXPIRATION_SECS = 86400
+HTTPCACHE_STORAGE = "_cache.CacheCompactaStorage"
+HTTPCACHE_POLICY = "_cache.RevalidacionPolicy"
+HTTPCACHE_EXPIRATION_SECS = 0  # sin vencimiento fijo: las respuestas viejas se revalidan
+HTTPCACHE_FRESCURA_SECS = 86400  # antes de esto se usan sin consultar al sitio
+HTTPCACHE_MAX_EDAD_SECS = 7 * 86400  # desalojo por antigüedad
+HTTPCACHE_MAX_MB = 2048  # desalojo por tamaño
+HTTPCACHE_COMMIT_CADA = 20  # respuestas por transacción como máximo
+HTTPCACHE_COMMIT_SECS = 1.0  # segundos por transacción como máximo
+HTTPCACHE_ESPERA_SECS = 60  # espera ante el lock de escritura de otro proceso
+HTTPCACHE_ARCHIVO = None  # nombre del archivo en HTTPCACHE_DIR; por defecto, `<spider>.sqlite3`
 
 ITEM_PIPELINES = {
-    "_pipelines.FechaPipeline" : 300
+    "_metricas.InicioPipelinesMetricas" : 0,
+    "_pipelines.NormalizacionPipeline" : 300,
+    "_base_datos.SQLitePipeline" : 800,
+    "_pipelines.IncrementalPipeline" : 900,
+    "_streaming.ColaPipeline" : 950,
+    "_metricas.FinPipelinesMetricas" : 1000,
+}
+
+# Base SQLite con el estado actual y el historial de cargos (la activa `main_scrapy(sqlite_path=...)`)
+SQLITE_PATH = None
+SQLITE_LOTE = 2000  # items por transacción
+SQLITE_CORRIDA = None  # inicio de la corrida (ISO 8601); por defecto, al abrir la spider
+
+# Tamaño de las cachés por campo de `NormalizacionPipeline`
+NORMALIZACION_CACHE = 4096
+
+# Extracción de perfiles en un pool de procesos (0 = en el hilo del reactor)
+EXTRACCION_PROCESOS = 0
+EXTRACCION_EN_VUELO = 64  # perfiles enviados al pool a la vez como máximo
+
+# Perfiles que se visitan: "todos", "ninguno" (solo las tarjetas del listado) o "cambios"
+# (solo los nuevos o cuya tarjeta cambió; requiere el modo incremental)
+DETALLE_PERFILES = "todos"
+
+# Modo incremental (lo activa `main_scrapy(incremental=True)`)
+INCREMENTAL_ESTADO_PATH = None
+INCREMENTAL_DELTA_PATH = None
+
+# Extensiones del proyecto; cada una se desactiva sola (NotConfigured) si no está configurada
+EXTENSIONS = {
+    "_checkpoint.CheckpointExtension": 500,
+    "_concurrencia.ConcurrenciaAdaptativa": 500,
+    "_metricas.MetricasExtension": 500,
+    "_particiones.ProgresoParticion": 500,
+    "_fallidos.ReintentoFallidos": 500,
 }
 
+# Checkpoints de la crawl reanudable (los activa `main_scrapy(resume=True)`)
+CHECKPOINT_PATH = None
+CHECKPOINT_INTERVALO = 60
+
+# Modo por particiones (`main_scrapy(workers=N)`): cada proceso recorre una de cada N hojas
+PARTICION_INDICE = 0
+PARTICION_TOTAL = 1
+PARTICION_INTERVALO = 10  # segundos entre reportes de avance al proceso principal
+
+# Métricas por etapa (las activa `main_scrapy(metricas_path=..., perfilar=...)`)
+METRICAS_PATH = None  # .json o .prom (texto de Prometheus)
+METRICAS_INTERVALO = 30
+METRICAS_PERFILADO = False
+METRICAS_PERFIL_PATH = None
+
 FEED_EXPORTERS = {
     "csv": "_exporters.SemiColonCsvItemExporter",
+    "parquet": "_exporters.ParquetItemExporter",
+    "xlsx": "_exporters.XlsxItemExporter",
 }
 
-TWISTED_REACTOR = "twisted.internet.iocpreactor.reactor.IOCPReactor"
+# Exportación Parquet (salidas `.parquet`)
+PARQUET_ROW_GROUP_SIZE = 5000
+PARQUET_COMPRESSION = "zstd"
+PARQUET_PARTITION_BY = None  # p. ej. ["institucion"]
+
+# Reactor: asyncio en todas las plataformas (epoll en Linux, kqueue en macOS), necesario para
+# pipelines `async def`. Si está instalado `uvloop` (Linux/macOS) se usa como event loop.
+# FUNCIONARIOS_REACTOR permite forzar otro reactor, p. ej. el IOCP de Windows:
+#   FUNCIONARIOS_REACTOR=twisted.internet.iocpreactor.reactor.IOCPReactor
+TWISTED_REACTOR = os.environ.get(
+    "FUNCIONARIOS_REACTOR", "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
+)
+if sys.platform != "win32" and importlib.util.find_spec("uvloop") is not None:
+    ASYNCIO_EVENT_LOOP = "uvloop.Loop"
@@ -1,24 +1,155 @@
+import logging
+import math
+import shutil
+from datetime import datetime
 from pathlib import Path
 from scrapy.crawler import CrawlerProcess
+from scrapy.utils.log import configure_logging
 from scrapy.utils.project import get_project_settings
 from _utils import medir_tiempo
+from _checkpoint import leer_checkpoint, leer_partes, fusionar_partes
+from _particiones import ejecutar_particiones
 from _funcionarios_spider import FuncionariosSpider
 import _settings as pkg_settings
 
+logger = logging.getLogger(__name__)
+
+FORMATOS = {".csv": "csv", ".parquet": "parquet", ".xlsx": "xlsx"}
+
+
+def _formato(path: Path) -> str:
+    """Formato del feed según la extensión del archivo de salida."""
+    try:
+        return FORMATOS[path.suffix.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Extensión no soportada: '{path.suffix}'. Opciones: {', '.join(FORMATOS)}"
+        ) from None
+
+
+def _opciones_feed(path: Path, s) -> dict:
+    formato = _formato(path)
+    if formato == "parquet":
+        return {
+            "format": "parquet",
+            "overwrite": True,
+            "item_export_kwargs": {
+                "row_group_size": s.getint("PARQUET_ROW_GROUP_SIZE"),
+                "compression": s.get("PARQUET_COMPRESSION"),
+                "partition_by": s.getlist("PARQUET_PARTITION_BY") or None,
+            },
+        }
+    if formato == "xlsx":
+        return {"format": "xlsx", "overwrite": True}
+    return {
+        "format": "csv",
+        "encoding": "utf-8-sig",
+        "overwrite": True,
+        "delimiter": ";"
+    }
+
+
+def _ruta_fallidos(output_path: str | Path) -> Path:
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}_fallidos.sqlite3")
+
+
 @medir_tiempo
-def main_scrapy(output_path: str | Path = "salida.csv", concurrent_requests: int = 40):
+def main_scrapy(
+    output_path: str | Path = "salida.csv",
+    concurrent_requests: int = 40,
+    incremental: bool = False,
+    estado_path: str | Path | None = None,
+    resume: bool = False,
+    concurrencia_adaptativa: bool = False,
+    metricas_path: str | Path | None = None,
+    perfilar: bool = False,
+    workers: int = 1,
+    procesos_extraccion: int = 0,
+    detalle: str = "todos",
+    instituciones: list[str] | None = None,
+    fallidos_path: str | Path | None = None,
+    sqlite_path: str | Path | None = None,
+    settings: dict | None = None,
+):
     """
-    Ejecuta la spider `FuncionariosPublicos` y guarda los items exportados en un archivo CSV
-    en la ruta señalada en output_path.
+    Ejecuta la spider `FuncionariosPublicos` y guarda los items exportados en un archivo CSV,
+    Parquet o Excel en la ruta señalada en output_path.
 
     Parameters
     ----------
     output_path : str or pathlib.Path, default "salida.csv"
-        Ruta del archivo de salida. Se exporta en formato **CSV** con codificación UTF-8 y
-        delimitador `;`. Si el archivo existe, se sobreescribe.
+        Ruta del archivo de salida. El formato se elige según la extensión:
+        `.csv` exporta en **CSV** con codificación UTF-8 y delimitador `;`; `.parquet` exporta
+        en **Parquet** con columnas tipadas (requiere `pyarrow`, ver `PARQUET_*` en
+        `_settings.py`); `.xlsx` exporta en **Excel**, fila por fila y con `fecha_inicio` como
+        fecha (requiere `openpyxl`). Si el archivo existe, se sobreescribe.
     concurrent_requests : int, default 40
         Número máximo de solicitudes concurrentes que usará Scrapy (`CONCURRENT_REQUESTS`).
         Valores altos aceleran el scraping pero pueden incrementar timeouts/ban y carga del sitio.
+    incremental : bool, default False
+        Si es True, revalida cada perfil contra el estado de la corrida anterior (ETag,
+        Last-Modified y hash del HTML) y reutiliza el item guardado cuando no hubo cambios.
+        Además del snapshot completo, escribe junto a `output_path` un feed delta
+        (`<nombre>_delta.csv`) con la columna `cambio`: "nuevo", "modificado" o "eliminado".
+    estado_path : str or pathlib.Path, optional
+        Ruta de la base SQLite con el estado incremental. Por defecto,
+        `estado_funcionarios.sqlite3` en la carpeta de `output_path`.
+    resume : bool, default False
+        Si es True, la crawl es reanudable: guarda checkpoints periódicos en la carpeta
+        `<output_path>.parcial` y, si ya existe un checkpoint de una corrida interrumpida,
+        continúa desde él sin volver a descargar los perfiles ya exportados. Al terminar,
+        une las salidas parciales en `output_path` y borra la carpeta de checkpoint.
+    concurrencia_adaptativa : bool, default False
+        Si es True, `concurrent_requests` pasa a ser el máximo y la concurrencia real se ajusta
+        durante la crawl según la latencia y la tasa de errores (timeouts, 429, 5xx): sube
+        mientras el sitio responde bien y retrocede rápido cuando no (ver `ADAPTATIVA_*` en
+        `_settings.py`).
+    metricas_path : str or pathlib.Path, optional
+        Archivo donde se escriben, cada `METRICAS_INTERVALO` segundos, las métricas por etapa:
+        latencias de descarga de listado y perfiles, tiempos de extracción, pipelines y
+        exportación, items/s, cola y reintentos. JSON, o texto de Prometheus si termina en `.prom`.
+    perfilar : bool, default False
+        Si es True, perfila con cProfile el hilo del reactor y guarda el resultado en
+        `<output_path>.prof` (se registran en el log las funciones más costosas).
+    workers : int, default 1
+        Número de procesos. Con `workers > 1` cada proceso corre su propia spider sobre una de
+        cada `workers` hojas del listado (con `concurrent_requests / workers` solicitudes
+        concurrentes, de modo que la carga sobre el sitio no cambia), y al final se unen sus
+        salidas en `output_path`, sin URLs repetidas y ordenadas por `url`. El avance y el tiempo
+        de cada partición se registran en el log. Solo admite salidas CSV.
+    procesos_extraccion : int, default 0
+        Si es mayor que 0, la extracción de los perfiles (XPath y limpieza del resumen) se hace
+        en un pool con ese número de procesos en lugar del hilo del reactor, así el parseo no
+        frena las descargas. Como máximo `EXTRACCION_EN_VUELO` perfiles esperan en el pool.
+    detalle : {"todos", "ninguno", "cambios"}, default "todos"
+        Qué perfiles se visitan. Con "ninguno" solo se recorre el listado y cada funcionario se
+        exporta con los campos de su tarjeta (nombre, cargo, institución y URL; los demás
+        quedan vacíos), con ~5 % de las solicitudes. Con "cambios" (requiere `incremental=True`)
+        solo se visitan los perfiles nuevos o cuya tarjeta cambió; los demás se exportan con el
+        item completo de la corrida anterior.
+    instituciones : list of str, optional
+        Slugs de las instituciones a recorrer (los de `gob.pe/institucion/<slug>`, p. ej.
+        `["ceplan", "minsa"]`). Si se indican, en lugar del listado general se recorren solo
+        los listados `/institucion/<slug>/funcionarios` de esas instituciones y sus perfiles,
+        con el mismo esquema de salida. Con `workers > 1` se reparten las instituciones entre
+        los procesos.
+    fallidos_path : str or pathlib.Path, optional
+        Ruta de la base SQLite donde se registran los perfiles que no se pudieron descargar
+        (URL, motivo del último fallo e intentos). Por defecto, `<nombre>_fallidos.sqlite3`
+        junto a `output_path`. Antes de cerrar, la crawl vuelve a pedir los fallidos en una
+        pasada diferida más lenta (ver `FALLIDOS_*` en `_settings.py`); los que aun así fallan
+        quedan en el registro para `reintentar_fallidos`.
+    sqlite_path : str or pathlib.Path, optional
+        Si se indica, además de `output_path` los funcionarios se guardan durante la crawl en
+        esta base SQLite (por lotes de `SQLITE_LOTE`, con WAL), una fila por URL de perfil que
+        se actualiza en cada corrida. La tabla `historial` registra, con la fecha de cada
+        corrida, los funcionarios nuevos, los cambios de cargo o institución y los que dejan de
+        figurar; `_base_datos.BaseFuncionarios(ruta).en_fecha("2025-03-01")` reconstruye el
+        directorio en esa fecha.
+    settings : dict, optional
+        Settings de Scrapy adicionales. Se aplican al final, por lo que tienen prioridad sobre
+        `_settings.py` y sobre los demás parámetros.
 
     Returns
     -------
@@ -35,38 +166,253 @@ def main_scrapy(output_path: str | Path = "salida.csv", concurrent_requests: int
 
     >>> main_scrapy(output_path="funcionarios_ceplan.csv", concurrent_requests=32)
 
+    Exportar en Parquet:
+
+    >>> main_scrapy(output_path="funcionarios.parquet")
+
+    Exportar en Excel:
+
+    >>> main_scrapy(output_path="funcionarios.xlsx")
+
+    Corrida incremental (solo reprocesa los perfiles que cambiaron):
+
+    >>> main_scrapy(output_path="funcionarios.csv", incremental=True)
+
+    Corrida reanudable (si se interrumpe, volver a llamarla con los mismos argumentos):
+
+    >>> main_scrapy(output_path="funcionarios.csv", resume=True)
+
+    Repartir la crawl en 4 procesos (usa 4 núcleos para el parseo):
+
+    >>> main_scrapy(output_path="funcionarios.csv", workers=4)
+
+    Extraer los perfiles en 3 procesos mientras el reactor solo descarga:
+
+    >>> main_scrapy(output_path="funcionarios.csv", procesos_extraccion=3)
+
+    Actualizar solo el padrón (quién está y dónde), sin visitar los perfiles:
+
+    >>> main_scrapy(output_path="padron.csv", detalle="ninguno")
+
+    Mantener una base SQLite con el historial de cargos (reutilizar la misma ruta cada vez):
+
+    >>> main_scrapy(output_path="funcionarios.csv", sqlite_path="funcionarios.sqlite3")
+
+    Actualizar solo algunas instituciones:
+
+    >>> main_scrapy(output_path="ceplan_minsa.csv", instituciones=["ceplan", "minsa"])
+
     Notes
     --------
     - Habilita logging a nivel `INFO`,
     - El archivo de salida se **sobrescribe** sin confirmación.
-    - Un nivel alto de concurrencia puede provocar errores en el sitio de destino.
+    - Un nivel alto de concurrencia puede provocar errores en el sitio de destino; con
+      `concurrencia_adaptativa=True` se busca automáticamente el máximo sostenible.
+    - En modo incremental se desactiva la caché HTTP para que la revalidación llegue al sitio.
+    - Los funcionarios eliminados solo se registran si se recorrió todo el listado sin fallos.
+    - En modo reanudable la salida se escribe primero en partes (una por intento) y solo al
+      final se reemplaza `output_path`; las filas se deduplican por `url`.
+    - El modo por particiones no se combina con `incremental` ni con `resume`: cada proceso
+      solo ve una parte del listado, así que no puede detectar eliminados ni reanudar el resto.
+      Con `metricas_path` cada partición escribe su propio archivo (`<nombre>-<i>.<ext>`), y
+      cada una usa su propia caché HTTP. Si una partición no recorre todas sus hojas del
+      listado, se considera fallida y no se escribe `output_path`.
+    - En modo incremental con `instituciones`, los eliminados se buscan solo entre los
+      funcionarios de esas instituciones.
+    - Con `sqlite_path`, los funcionarios que dejan de figurar solo se marcan como no vigentes
+      si se recorrió todo el listado (o todas las `instituciones` indicadas), y nunca en el modo
+      por particiones por hojas. Un perfil que figura en el listado pero no se pudo descargar
+      no se marca. Con `resume=True`, todos los intentos registran una sola corrida.
     """
     # cargar settings del paquete
     s = get_project_settings()
     for k, v in pkg_settings.__dict__.items():
         if k.isupper():
             s.set(k, v, priority="project")
+    # settings adicionales: prioridad "cmdline" para que ningún valor posterior los pise
+    for k, v in (settings or {}).items():
+        s.set(k, v, priority="cmdline")
     
+    if detalle not in ("todos", "ninguno", "cambios"):
+        raise ValueError(f"`detalle` no válido: {detalle!r}. Opciones: todos, ninguno, cambios")
+    if detalle == "cambios" and not incremental:
+        raise ValueError('`detalle="cambios"` requiere `incremental=True`')
+    if detalle == "ninguno" and incremental:
+        # Las tarjetas reemplazarían en el estado a los items completos de la corrida anterior
+        raise ValueError('`detalle="ninguno"` no admite `incremental=True`; usar `detalle="cambios"`')
+
+    if workers > 1:
+        if incremental or resume:
+            raise ValueError("El modo por particiones no admite `incremental` ni `resume`")
+        if _formato(Path(output_path)) != "csv":
+            raise ValueError("El modo por particiones solo admite salidas CSV")
+        configure_logging(s)
+        carpeta = Path(f"{output_path}.particiones")
+        # Con suficientes instituciones, cada proceso recorre algunas completas; si no, cada
+        # proceso recorre una de cada `workers` hojas de todos los listados
+        por_institucion = bool(instituciones) and len(instituciones) >= workers
+        # Todas las particiones registran una misma corrida en la base SQLite
+        corrida = datetime.now().isoformat(timespec="seconds")
+        parametros = []
+        for i in range(workers):
+            extra = {
+                "PARTICION_TOTAL": 1 if por_institucion else workers,
+                # Un solo registro de fallidos para todas las particiones
+                "FALLIDOS_PATH": str(fallidos_path or _ruta_fallidos(output_path)),
+                "SQLITE_CORRIDA": corrida,
+                # Una caché HTTP por partición: SQLite no admite varios procesos escribiendo a la vez
+                "HTTPCACHE_ARCHIVO": f"{FuncionariosSpider.name}-{i}.sqlite3",
+            }
+            if perfilar:
+                extra["METRICAS_PERFIL_PATH"] = f"{output_path}.{i}.prof"
+            metricas_particion = None
+            if metricas_path:
+                ruta = Path(metricas_path)
+                metricas_particion = str(ruta.with_name(f"{ruta.stem}-{i}{ruta.suffix}"))
+            parametros.append(
+                {
+                    "output_path": str(carpeta / f"particion-{i:02d}.csv"),
+                    "concurrent_requests": math.ceil(concurrent_requests / workers),
+                    "concurrencia_adaptativa": concurrencia_adaptativa,
+                    "metricas_path": metricas_particion,
+                    "perfilar": perfilar,
+                    "procesos_extraccion": procesos_extraccion,
+                    "detalle": detalle,
+                    "instituciones": instituciones[i::workers] if por_institucion else instituciones,
+                    "sqlite_path": sqlite_path,
+                    "settings": {**(settings or {}), **extra},
+                }
+            )
+        ejecutar_particiones(parametros, output_path)
+        return
+
     # # Configuración del log (por defecto en INFO)
     # s.set("LOG_ENABLED", True, priority="project")
     # s.set("LOG_LEVEL", "INFO", priority="project")  # opciones: DEBUG, INFO, WARNING, ERROR, CRITICAL
 
+    spider_kwargs = {}
+    feed_path = Path(output_path)
+    if resume:
+        if _formato(feed_path) != "csv":
+            raise ValueError("El modo reanudable solo admite salidas CSV")
+        # Cada intento escribe su propia parte; al terminar se unen en output_path
+        parcial = Path(f"{output_path}.parcial")
+        parcial.mkdir(parents=True, exist_ok=True)
+        checkpoint_path = parcial / "checkpoint.json"
+        partes = sorted(parcial.glob("parte-*.csv"))
+        checkpoint = leer_checkpoint(checkpoint_path)
+        corrida = None
+        if checkpoint is not None:
+            cabecera, filas = leer_partes(partes)
+            completados = [fila[cabecera.index("url")] for fila in filas]
+            spider_kwargs["reanudar"] = {**checkpoint, "completados": completados}
+            s.set("INCREMENTAL_DELTA_REANUDAR", True, priority="project")
+            corrida = checkpoint.get("corrida")
+        # Todos los intentos de una crawl reanudable son una misma corrida en la base SQLite
+        s.set("SQLITE_CORRIDA", corrida or datetime.now().isoformat(timespec="seconds"), priority="project")
+        feed_path = parcial / f"parte-{len(partes) + 1:04d}.csv"
+        s.set("CHECKPOINT_PATH", str(checkpoint_path), priority="project")
+
     # FEEDS para exportar sin pipeline de DB
-    s.set(
-        "FEEDS",
-        {
-            str(output_path): {
-                "format": "csv",
-                "encoding": "utf-8-sig",
-                "overwrite": True,
-                "delimiter": ";"
-            }
-        },
-        priority="project",
-    )
+    s.set("FEEDS", {str(feed_path): _opciones_feed(feed_path, s)}, priority="project")
+    if incremental:
+        output_path = Path(output_path)
+        estado_path = estado_path or output_path.parent / "estado_funcionarios.sqlite3"
+        s.set("INCREMENTAL_ESTADO_PATH", str(estado_path), priority="project")
+        s.set(
+            "INCREMENTAL_DELTA_PATH",
+            str(output_path.with_name(f"{output_path.stem}_delta.csv")),
+            priority="project",
+        )
+        s.set("HTTPCACHE_ENABLED", False, priority="project")
+
     s.set("CONCURRENT_REQUESTS", concurrent_requests)
     s.set("CONCURRENT_REQUESTS_PER_DOMAIN", concurrent_requests)
+    if metricas_path:
+        s.set("METRICAS_PATH", str(metricas_path), priority="project")
+    if perfilar:
+        s.set("METRICAS_PERFILADO", True, priority="project")
+        s.set("METRICAS_PERFIL_PATH", f"{output_path}.prof", priority="project")
+    s.set("DETALLE_PERFILES", detalle, priority="project")
+    s.set("FALLIDOS_PATH", str(fallidos_path or _ruta_fallidos(output_path)), priority="project")
+    if sqlite_path:
+        s.set("SQLITE_PATH", str(sqlite_path), priority="project")
+    if instituciones:
+        s.set("DIRECTORIO_INSTITUCIONES", list(instituciones), priority="project")
+    if procesos_extraccion > 0:
+        s.set("EXTRACCION_PROCESOS", procesos_extraccion, priority="project")
+    if concurrencia_adaptativa:
+        s.set("ADAPTATIVA_ENABLED", True, priority="project")
+        s.set("ADAPTATIVA_MAX", concurrent_requests, priority="project")
 
     process = CrawlerProcess(settings=s)
-    process.crawl(FuncionariosSpider)
+    process.crawl(FuncionariosSpider, **spider_kwargs)
     process.start()
+
+    if resume:
+        checkpoint = leer_checkpoint(checkpoint_path)
+        if checkpoint is not None and checkpoint["terminado"]:
+            fusionar_partes(sorted(parcial.glob("parte-*.csv")), output_path)
+            shutil.rmtree(parcial)
+
+
+@medir_tiempo
+def reintentar_fallidos(
+    output_path: str | Path = "salida.csv",
+    fallidos_path: str | Path | None = None,
+    concurrent_requests: int = 8,
+    settings: dict | None = None,
+) -> int:
+    """
+    Vuelve a pedir solo los perfiles registrados como fallidos en corridas anteriores, sin
+    recorrer el listado, y agrega los que se recuperan a `output_path`. Devuelve el número de
+    funcionarios recuperados.
+
+    Parameters
+    ----------
+    output_path : str or pathlib.Path, default "salida.csv"
+        Salida CSV de la corrida que tuvo fallos. Si existe, los perfiles recuperados se
+        agregan al final (sin URLs repetidas); si no, se crea solo con ellos.
+    fallidos_path : str or pathlib.Path, optional
+        Registro de fallidos. Por defecto, el de `main_scrapy` para `output_path`
+        (`<nombre>_fallidos.sqlite3`).
+    concurrent_requests : int, default 8
+        Solicitudes concurrentes. Por defecto menos que una crawl completa, ya que los
+        perfiles fallidos suelen coincidir con momentos de carga del sitio.
+    settings : dict, optional
+        Settings de Scrapy adicionales, como en `main_scrapy`.
+
+    Examples
+    --------
+    >>> main_scrapy(output_path="funcionarios.csv")
+    >>> reintentar_fallidos(output_path="funcionarios.csv")  # en otro proceso, más tarde
+
+    Notes
+    --------
+    - Los perfiles recuperados salen del registro; los que vuelven a fallar (también tras la
+      pasada diferida) quedan en él con sus intentos acumulados.
+    - Como `main_scrapy`, no se puede llamar dos veces en el mismo proceso (el reactor de
+      Twisted no se puede reiniciar).
+    """
+    output_path = Path(output_path)
+    if _formato(output_path) != "csv":
+        raise ValueError("`reintentar_fallidos` solo admite salidas CSV")
+    fallidos_path = Path(fallidos_path or _ruta_fallidos(output_path))
+    if not fallidos_path.exists():
+        logger.info(f"No hay registro de fallidos en {fallidos_path}")
+        return 0
+
+    recuperados_path = output_path.with_name(f"{output_path.stem}_recuperados.csv")
+    main_scrapy(
+        output_path=recuperados_path,
+        concurrent_requests=concurrent_requests,
+        fallidos_path=fallidos_path,
+        settings={**(settings or {}), "FALLIDOS_SOLO": True},
+    )
+    _, filas = leer_partes([recuperados_path])
+    if filas:
+        partes = [output_path, recuperados_path] if output_path.exists() else [recuperados_path]
+        fusionar_partes(partes, output_path)
+    recuperados_path.unlink(missing_ok=True)
+    logger.info(f"🔁 {len(filas)} perfiles recuperados agregados a {output_path}")
+    return len(filas)
@@ -0,0 +1,134 @@
+import multiprocessing
+import queue
+from itertools import islice
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import task
+
+# Cola hacia el proceso consumidor; solo existe dentro del proceso de la crawl (ver `_particiones`)
+_cola = None
+
+_FIN = "fin"
+
+
+class ColaPipeline:
+    """
+    Envía cada item ya normalizado a la cola de `iter_funcionarios`.
+
+    Si el consumidor se atrasa y la cola se llena, el item espera sin bloquear el reactor; como
+    la respuesta que lo produjo sigue en proceso, Scrapy deja de descargar cuando se acumulan
+    demasiadas (`SCRAPER_SLOT_MAX_ACTIVE_SIZE`): la crawl avanza al ritmo del consumidor.
+    """
+
+    def __init__(self, cola, espera: float = 0.05):
+        self.cola = cola
+        self.espera = espera
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if _cola is None:
+            raise NotConfigured
+        return cls(_cola)
+
+    async def process_item(self, item, spider):
+        from twisted.internet import reactor
+
+        while True:
+            try:
+                self.cola.put_nowait(dict(item))
+                return item
+            except queue.Full:
+                await maybe_deferred_to_future(task.deferLater(reactor, self.espera, lambda: None))
+
+
+def _producir(cola, parametros: dict):
+    """Punto de entrada del proceso de la crawl: corre `main_scrapy` sin escribir archivos."""
+    global _cola
+    _cola = cola
+    from _spider_function import main_scrapy
+
+    error = None
+    try:
+        main_scrapy(**parametros)
+    except Exception as e:
+        error = repr(e)
+    cola.put((_FIN, error))
+
+
+def iter_funcionarios(
+    concurrent_requests: int = 40,
+    instituciones: list[str] | None = None,
+    detalle: str = "todos",
+    concurrencia_adaptativa: bool = False,
+    procesos_extraccion: int = 0,
+    settings: dict | None = None,
+    tamano_cola: int = 1000,
+):
+    """
+    Recorre el directorio y devuelve los funcionarios a medida que se extraen, como dicts con
+    el mismo esquema (y la misma normalización) que el CSV de `main_scrapy`.
+
+    La crawl corre en un proceso aparte (el reactor de Twisted no se puede reiniciar ni
+    compartir con el código del consumidor) y entrega los items por una cola de
+    `tamano_cola` elementos: si el consumidor es más lento, la crawl se frena en lugar de
+    acumular items en memoria. Si se deja de iterar antes del final, la crawl se detiene.
+
+    Los parámetros tienen el mismo significado que en `main_scrapy`; no se escribe ningún archivo.
+
+    Examples
+    --------
+    >>> for funcionario in iter_funcionarios(instituciones=["ceplan"]):
+    ...     print(funcionario["nombre"], funcionario["cargo"])
+    """
+    parametros = {
+        "concurrent_requests": concurrent_requests,
+        "instituciones": instituciones,
+        "detalle": detalle,
+        "concurrencia_adaptativa": concurrencia_adaptativa,
+        "procesos_extraccion": procesos_extraccion,
+        # Sin FEEDS ni registro de fallidos: los items solo salen por la cola
+        "settings": {**(settings or {}), "FEEDS": {}, "FALLIDOS_PATH": None},
+    }
+    contexto = multiprocessing.get_context("spawn")
+    cola = contexto.Queue(maxsize=max(1, tamano_cola))
+    proceso = contexto.Process(target=_producir, args=(cola, parametros), name="iter_funcionarios", daemon=True)
+    proceso.start()
+    try:
+        while True:
+            try:
+                mensaje = cola.get(timeout=1)
+            except queue.Empty:
+                if not proceso.is_alive():
+                    raise RuntimeError(f"La crawl terminó inesperadamente (código {proceso.exitcode})") from None
+                continue
+            if isinstance(mensaje, tuple) and mensaje[0] == _FIN:
+                if mensaje[1] is not None:
+                    raise RuntimeError(f"La crawl falló: {mensaje[1]}")
+                return
+            yield mensaje
+    finally:
+        if proceso.is_alive():
+            proceso.terminate()
+        proceso.join()
+        cola.close()
+
+
+def iter_lotes(tamano: int = 500, **kwargs):
+    """Como `iter_funcionarios`, pero agrupa los funcionarios en listas de hasta `tamano`."""
+    funcionarios = iter_funcionarios(**kwargs)
+    try:
+        while lote := list(islice(funcionarios, tamano)):
+            yield lote
+    finally:
+        funcionarios.close()
+
+
+def iter_dataframes(tamano: int = 5000, **kwargs):
+    """Como `iter_lotes`, pero cada lote es un `pandas.DataFrame` con `fecha_inicio` como fecha."""
+    import pandas as pd
+
+    for lote in iter_lotes(tamano, **kwargs):
+        df = pd.DataFrame.from_records(lote)
+        if "fecha_inicio" in df:
+            df["fecha_inicio"] = pd.to_datetime(df["fecha_inicio"], format="%Y-%m-%d", errors="coerce")
+        yield df
@@ -1,5 +1,10 @@
 from functools import wraps
+import logging
 import timeit
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.threads import deferToThread
+
+logger = logging.getLogger(__name__)
 
 
 def medir_tiempo(func):
@@ -20,13 +25,21 @@ def medir_tiempo(func):
         horas_name = "horas" if horas != 1 else "hora"
         minutos_name = "minutos" if minutos != 1 else "minuto"
 
-        # Registrar tiempo de ejecución
-        #print(f"La función '{func.__name__}' tardó {horas} {horas_name}, {minutos} {minutos_name} y {segundos:.2f} segundos en ejecutarse.") 
-        print(f"La función '{func.__name__}' tardó {horas} {horas_name} y {minutos} {minutos_name} en ejecutarse.") 
+        # Registrar tiempo de ejecución (el detalle por etapa lo da `_metricas.MetricasExtension`)
+        logger.info(f"La función '{func.__name__}' tardó {horas} {horas_name}, {minutos} {minutos_name} y {segundos:.2f} segundos en ejecutarse.")
 
         return resultado
     return wrapper
 
+
+async def en_hilo(func, *args, **kwargs):
+    """
+    Ejecuta `func` en el pool de hilos del reactor y espera su resultado sin bloquear las
+    descargas. Pensado para pipelines `async def` con trabajo de E/S lento (SQLite, compresión).
+    """
+    return await maybe_deferred_to_future(deferToThread(func, *args, **kwargs))
+
+
 # @medir_tiempo
 # def prueba():
 #     for _ in range(600_000_000_0):
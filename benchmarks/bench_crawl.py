@@ -0,0 +1,134 @@
+"""
+Benchmark de extremo a extremo de la crawl, sin tocar gob.pe.
+
+Levanta `servidor.py` en un hilo y ejecuta `main_scrapy` con `FuncionariosSpider` contra él en
+un subproceso (el reactor de Twisted no se puede reiniciar), una vez por repetición. Reporta
+items/s, latencia p50/p99 por etapa (listado y perfiles), pico de RSS y tiempos por etapa, y
+guarda los resultados en JSON en `benchmarks/resultados/` junto con el commit actual, para
+poder compararlos entre commits.
+
+Uso:
+    python benchmarks/bench_crawl.py --hojas 50 --latencia 0.05 --tasa-error 0.01
+    python benchmarks/bench_crawl.py --concurrencia 16 --setting FRONTERA_VENTANA_HOJAS=4
+    python benchmarks/bench_crawl.py --sin-paginacion --setting 'DIRECTORIO_INSTITUCIONES=["ceplan","minsa"]'
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+RAIZ = BENCH_DIR.parent
+sys.path.insert(0, str(RAIZ))
+sys.path.insert(0, str(BENCH_DIR))
+
+from servidor import ServidorDirectorio
+from medicion import percentil
+
+
+def _valor(texto: str):
+    try:
+        return json.loads(texto)
+    except json.JSONDecodeError:
+        return texto
+
+
+def ejecutar_hijo(config: dict):
+    """Corre `main_scrapy` dentro del subproceso con la extensión de medición."""
+    import _settings as pkg_settings
+    from _spider_function import main_scrapy
+
+    settings = {
+        "DIRECTORIO_BASE_URL": config["base_url"],
+        "HTTPCACHE_ENABLED": False,
+        "LOG_LEVEL": "WARNING",
+        "EXTENSIONS": {**pkg_settings.EXTENSIONS, "medicion.MedicionExtension": 0},
+        "BENCH_RESULTADO_PATH": config["resultado"],
+        **config["settings"],
+    }
+    main_scrapy(config["salida"], concurrent_requests=config["concurrencia"], settings=settings)
+
+
+def commit_actual() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hojas", type=int, default=20)
+    parser.add_argument("--latencia", type=float, default=0.02, help="segundos por respuesta del servidor")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="fracción de respuestas 503")
+    parser.add_argument("--grabacion", type=Path, help="carpeta con perfiles HTML grabados")
+    parser.add_argument("--sin-paginacion", action="store_true",
+                        help="listados sin enlace a la última página (recorrido hoja por hoja)")
+    parser.add_argument("--concurrencia", type=int, default=40)
+    parser.add_argument("--repeticiones", type=int, default=1)
+    parser.add_argument("--setting", action="append", default=[], metavar="CLAVE=VALOR",
+                        help="setting de Scrapy adicional (el valor se interpreta como JSON si es posible)")
+    parser.add_argument("--salida", type=Path, help="archivo JSON de resultados")
+    parser.add_argument("--hijo", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        return ejecutar_hijo(json.loads(args.hijo))
+
+    settings = {clave: _valor(valor) for clave, valor in (s.split("=", 1) for s in args.setting)}
+    servidor = ServidorDirectorio(
+        hojas=args.hojas,
+        latencia=args.latencia,
+        tasa_error=args.tasa_error,
+        grabacion=args.grabacion,
+        paginacion=not args.sin_paginacion,
+    ).iniciar()
+
+    corridas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.repeticiones):
+            config = {
+                "base_url": servidor.base_url,
+                "salida": str(Path(tmp) / f"salida_{i}.csv"),
+                "resultado": str(Path(tmp) / f"resultado_{i}.json"),
+                "concurrencia": args.concurrencia,
+                "settings": settings,
+            }
+            inicio = time.perf_counter()
+            subprocess.run([sys.executable, __file__, "--hijo", json.dumps(config)], cwd=RAIZ, check=True)
+            corrida = json.loads(Path(config["resultado"]).read_text(encoding="utf-8"))
+            corrida["segundos_proceso"] = time.perf_counter() - inicio
+            corridas.append(corrida)
+    servidor.shutdown()
+
+    resultado = {
+        "commit": commit_actual(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "parametros": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items() if k != "hijo"},
+        "mediana_items_por_segundo": percentil([c["items_por_segundo"] for c in corridas], 50),
+        "corridas": corridas,
+    }
+
+    salida = args.salida or BENCH_DIR / "resultados" / f"{datetime.now():%Y%m%d_%H%M%S}_{resultado['commit']}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(resultado, indent=2), encoding="utf-8")
+
+    for i, c in enumerate(corridas, 1):
+        lat = c["latencia"]
+        print(
+            f"[{i}] {c['items']} items en {c['segundos']:.1f} s ({c['items_por_segundo']:.1f} items/s) | "
+            f"listado p50/p99 {lat['listado']['p50'] or 0:.3f}/{lat['listado']['p99'] or 0:.3f} s | "
+            f"perfil p50/p99 {lat['perfil']['p50'] or 0:.3f}/{lat['perfil']['p99'] or 0:.3f} s | "
+            f"RSS {c['rss_maximo_mb'] or 0:.0f} MB"
+        )
+    print(f"Resultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
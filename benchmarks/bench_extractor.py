@@ -0,0 +1,216 @@
+"""
+Micro-benchmark de la extracción de perfiles (`parse_item`).
+
+Compara la extracción original (una consulta `response.xpath` por campo sobre todo el
+documento, compilando cada expresión en cada documento) con `ExtractorFuncionario` sobre un
+corpus de perfiles HTML y reporta documentos por segundo (con y sin el parseo del HTML, que
+Scrapy hace de todos modos) y el costo por campo.
+
+Uso:
+    python benchmarks/bench_extractor.py
+    python benchmarks/bench_extractor.py --fixtures benchmarks/fixtures/perfiles --json resultado.json
+    python benchmarks/bench_extractor.py --min-docs-por-segundo 2000   # falla si hay regresión
+    python benchmarks/bench_extractor.py --requerir-fixtures           # falla sin perfiles reales
+
+Antes de medir, comprueba que ambas extracciones den exactamente los mismos items en todo el
+corpus. El corpus son los perfiles reales grabados con `grabar_fixtures.py`; si la carpeta de
+fixtures no tiene archivos `*.html` se usan perfiles sintéticos, que solo sirven para medir:
+se escribieron a la medida de los selectores y no prueban la equivalencia sobre gob.pe.
+
+Si hay hojas del listado grabadas, comprueba también `TarjetaXPaths` sobre ellas: cada tarjeta
+debe dar nombre, cargo e institución y, si su perfil también está grabado, coincidir con él.
+"""
+import argparse
+import json
+import sys
+import timeit
+from dataclasses import fields
+from pathlib import Path
+from urllib.parse import urljoin
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lxml import etree, html
+from parsel import Selector
+from _extractor import (
+    CAMPOS_TARJETA, ExtractorFuncionario, ExtractorTarjeta, FuncionarioXPaths, limpiar_resumen, tarjeta_modificada
+)
+from _settings import DIRECTORIO_BASE_URL
+from sinteticos import pagina_perfil, url_perfil
+
+FIXTURES = Path(__file__).parent / "fixtures" / "perfiles"
+# Mismo selector de tarjetas que `FuncionariosSpider.parse`
+_TARJETAS = etree.XPath(
+    '//a[contains(@class, "link-transition") and contains(@class, "justify-between") '
+    'and contains(@class, "mt-8")][contains(@href, "/institucion/") and contains(@href, "/funcionarios/")]'
+)
+
+
+def cargar_corpus(carpeta: Path, sinteticos: int) -> tuple[list[tuple[str, bytes]], bool]:
+    """Corpus de (URL, HTML) y si son perfiles reales grabados."""
+    archivos = sorted(carpeta.glob("*.html")) if carpeta.exists() else []
+    if archivos:
+        ruta_indice = carpeta.parent / "indice.json"
+        indice = json.loads(ruta_indice.read_text(encoding="utf-8")) if ruta_indice.exists() else {}
+        return [
+            (indice.get(f"{carpeta.name}/{archivo.name}", f"https://www.gob.pe/{archivo.stem}"), archivo.read_bytes())
+            for archivo in archivos
+        ], True
+    corpus = [(f"https://www.gob.pe{url_perfil(i)}", pagina_perfil(i).encode("utf-8")) for i in range(sinteticos)]
+    return corpus, False
+
+
+def comprobar_tarjetas(carpeta: Path, perfiles: dict[str, dict]) -> tuple[int, list[str]]:
+    """
+    Aplica `ExtractorTarjeta` a las hojas del listado grabadas en `carpeta`. Devuelve cuántas
+    tarjetas se revisaron y los problemas encontrados: campos vacíos o tarjetas que no coinciden
+    con el perfil grabado del mismo funcionario.
+    """
+    extractor = ExtractorTarjeta()
+    revisadas, problemas = 0, []
+    for archivo in sorted(carpeta.glob("*.html")) if carpeta.exists() else []:
+        for nodo in _TARJETAS(html.fromstring(archivo.read_bytes())):
+            url = urljoin(DIRECTORIO_BASE_URL, nodo.get("href"))
+            tarjeta = extractor.extraer(nodo, url)
+            revisadas += 1
+            if vacios := [campo for campo in CAMPOS_TARJETA if not tarjeta[campo]]:
+                problemas.append(f"  {archivo.name} {url}: sin {', '.join(vacios)}")
+            elif url in perfiles and tarjeta_modificada(perfiles[url], tarjeta):
+                distintos = {campo: (tarjeta[campo], perfiles[url][campo]) for campo in CAMPOS_TARJETA}
+                problemas.append(f"  {archivo.name} {url}: tarjeta y perfil difieren {distintos}")
+    return revisadas, problemas
+
+
+def extraer_original(body: bytes, url: str, xpaths: FuncionarioXPaths) -> dict:
+    """Réplica de la extracción previa: una consulta parsel por campo."""
+    sel = Selector(body=body, type="html")
+    item = {
+        campo.name: sel.xpath(getattr(xpaths, campo.name)).get()
+        for campo in fields(xpaths)
+        if campo.name != "resumen"
+    }
+    item["url"] = url
+    item["resumen"] = limpiar_resumen(sel.xpath(xpaths.resumen).getall())
+    return item
+
+
+def medir(funcion, repeticiones: int) -> float:
+    return min(timeit.repeat(funcion, number=1, repeat=repeticiones))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES)
+    parser.add_argument("--sinteticos", type=int, default=300)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--json", type=Path, help="ruta donde guardar los resultados")
+    parser.add_argument("--min-docs-por-segundo", type=float, help="umbral mínimo para el extractor compilado")
+    parser.add_argument("--requerir-fixtures", action="store_true",
+                        help="fallar si no hay perfiles reales grabados (ver grabar_fixtures.py)")
+    args = parser.parse_args()
+
+    xpaths = FuncionarioXPaths()
+    extractor = ExtractorFuncionario(xpaths)
+    corpus, reales = cargar_corpus(args.fixtures, args.sinteticos)
+    if not reales:
+        aviso = f"Sin perfiles grabados en {args.fixtures}: la equivalencia solo se comprueba en perfiles sintéticos"
+        if args.requerir_fixtures:
+            sys.exit(f"{aviso}. Grabarlos con `python benchmarks/grabar_fixtures.py`.")
+        print(f"⚠️  {aviso}.")
+
+    # Ambas implementaciones deben producir exactamente los mismos items
+    diferencias, perfiles = [], {}
+    for url, body in corpus:
+        esperado = extraer_original(body, url, xpaths)
+        obtenido = perfiles[url] = extractor.extraer_html(body, url)
+        for campo in esperado:
+            if esperado[campo] != obtenido.get(campo):
+                diferencias.append(f"  {url} [{campo}]: original {esperado[campo]!r}, extractor {obtenido.get(campo)!r}")
+    if diferencias:
+        sys.exit(f"{len(diferencias)} diferencias entre la extracción original y el extractor:\n" + "\n".join(diferencias))
+
+    # Las tarjetas del listado deben dar los mismos campos que el perfil
+    listados = args.fixtures.parent / "listados"
+    tarjetas, problemas = comprobar_tarjetas(listados, perfiles if reales else {})
+    if problemas:
+        sys.exit(f"{len(problemas)} tarjetas con problemas en {listados}:\n" + "\n".join(problemas))
+    if tarjetas:
+        print(f"Tarjetas del listado revisadas: {tarjetas}")
+    elif args.requerir_fixtures:
+        sys.exit(f"Sin hojas del listado grabadas en {listados}. Grabarlas con `python benchmarks/grabar_fixtures.py`.")
+    else:
+        print(f"⚠️  Sin hojas del listado grabadas en {listados}: `TarjetaXPaths` no se comprueba.")
+
+    original = medir(lambda: [extraer_original(b, u, xpaths) for u, b in corpus], args.repeticiones)
+    compilado = medir(lambda: [extractor.extraer_html(b, u) for u, b in corpus], args.repeticiones)
+
+    # Extracción y costo por campo sobre documentos ya parseados (sin contar el parseo)
+    selectores = [Selector(body=b, type="html") for _, b in corpus]
+    raices = [etree.fromstring(b, parser=html.HTMLParser(encoding="utf-8")) for _, b in corpus]
+    urls = [u for u, _ in corpus]
+    original_sin_parseo = medir(
+        lambda: [
+            {campo.name: s.xpath(getattr(xpaths, campo.name)).getall() for campo in fields(xpaths)}
+            for s in selectores
+        ],
+        args.repeticiones,
+    )
+    compilado_sin_parseo = medir(
+        lambda: [extractor.extraer(r, u) for r, u in zip(raices, urls)], args.repeticiones
+    )
+    contenedores = [extractor.ubicar_contenedor(r) for r in raices]
+    t_contenedor = medir(lambda: [extractor.ubicar_contenedor(r) for r in raices], args.repeticiones)
+    por_campo = {}
+    for campo in fields(xpaths):
+        expresion = getattr(xpaths, campo.name)
+        t_original = medir(lambda: [s.xpath(expresion).getall() for s in selectores], args.repeticiones)
+        t_compilado = medir(
+            lambda: [extractor.relativas[campo.name](c) for c in contenedores], args.repeticiones
+        )
+        por_campo[campo.name] = {
+            "original_us": t_original / len(corpus) * 1e6,
+            "compilado_us": t_compilado / len(corpus) * 1e6,
+        }
+
+    resultado = {
+        "documentos": len(corpus),
+        "perfiles_reales": reales,
+        "original_docs_por_segundo": len(corpus) / original,
+        "compilado_docs_por_segundo": len(corpus) / compilado,
+        "aceleracion": original / compilado,
+        "original_sin_parseo_docs_por_segundo": len(corpus) / original_sin_parseo,
+        "compilado_sin_parseo_docs_por_segundo": len(corpus) / compilado_sin_parseo,
+        "aceleracion_sin_parseo": original_sin_parseo / compilado_sin_parseo,
+        "contenedor_us": t_contenedor / len(corpus) * 1e6,
+        "por_campo": por_campo,
+    }
+
+    print(f"Documentos: {len(corpus)} ({'grabados' if reales else 'sintéticos'})")
+    print(f"{'':<14}{'docs/s':>12}")
+    print(f"{'original':<14}{resultado['original_docs_por_segundo']:>12.0f}")
+    print(f"{'compilado':<14}{resultado['compilado_docs_por_segundo']:>12.0f}  (x{resultado['aceleracion']:.2f})")
+    print()
+    print("Sin parseo (documentos ya parseados, como en `parse_item`):")
+    print(f"{'original':<14}{resultado['original_sin_parseo_docs_por_segundo']:>12.0f}")
+    print(
+        f"{'compilado':<14}{resultado['compilado_sin_parseo_docs_por_segundo']:>12.0f}"
+        f"  (x{resultado['aceleracion_sin_parseo']:.2f})"
+    )
+    print()
+    print(f"Ubicar el contenedor: {resultado['contenedor_us']:.1f} µs por documento")
+    print(f"{'campo':<14}{'original µs':>14}{'compilado µs':>14}")
+    for campo, tiempos in por_campo.items():
+        print(f"{campo:<14}{tiempos['original_us']:>14.1f}{tiempos['compilado_us']:>14.1f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(resultado, indent=2), encoding="utf-8")
+
+    if args.min_docs_por_segundo and resultado["compilado_docs_por_segundo"] < args.min_docs_por_segundo:
+        sys.exit(
+            f"Regresión: {resultado['compilado_docs_por_segundo']:.0f} docs/s "
+            f"< {args.min_docs_por_segundo:.0f} docs/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Graba páginas reales de gob.pe como fixtures de `bench_extractor.py`.
+
+Descarga algunas hojas del listado general en `benchmarks/fixtures/listados/` y los perfiles
+que enlazan en `benchmarks/fixtures/perfiles/`, junto con `indice.json` (archivo -> URL). Así
+los extractores se comparan sobre HTML real y no solo sobre las páginas de `sinteticos.py`,
+que se escribieron a la medida de los selectores.
+
+Uso:
+    python benchmarks/grabar_fixtures.py --hojas 3 --perfiles 40
+    python benchmarks/grabar_fixtures.py --institucion ceplan --perfiles 20
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import requests
+from lxml import html
+import _settings as pkg_settings
+
+FIXTURES = Path(__file__).parent / "fixtures"
+_TARJETAS = (
+    '//a[contains(@class, "link-transition") and contains(@class, "justify-between") '
+    'and contains(@class, "mt-8")]/@href'
+)
+
+
+def nombre_archivo(url: str) -> str:
+    """Nombre de archivo estable para una URL (su ruta y consulta, sin caracteres especiales)."""
+    partes = urlparse(url)
+    ruta = f"{partes.path}_{partes.query}" if partes.query else partes.path
+    return re.sub(r"[^\w.-]+", "_", ruta).strip("_") + ".html"
+
+
+def descargar(sesion: requests.Session, url: str, destino: Path, indice: dict) -> bytes:
+    respuesta = sesion.get(url, timeout=pkg_settings.DOWNLOAD_TIMEOUT)
+    respuesta.raise_for_status()
+    destino.mkdir(parents=True, exist_ok=True)
+    archivo = destino / nombre_archivo(url)
+    archivo.write_bytes(respuesta.content)
+    indice[str(archivo.relative_to(FIXTURES))] = url
+    print(f"  {url} -> {archivo.relative_to(FIXTURES)}")
+    return respuesta.content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hojas", type=int, default=2, help="hojas del listado a grabar")
+    parser.add_argument("--perfiles", type=int, default=40, help="perfiles a grabar como máximo")
+    parser.add_argument("--institucion", help="grabar el listado de esta institución en vez del general")
+    parser.add_argument("--base-url", default=pkg_settings.DIRECTORIO_BASE_URL)
+    parser.add_argument("--demora", type=float, default=0.5, help="segundos entre solicitudes")
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip("/")
+    sesion = requests.Session()
+    sesion.headers["User-Agent"] = pkg_settings.USER_AGENT
+    ruta_indice = FIXTURES / "indice.json"
+    indice = json.loads(ruta_indice.read_text(encoding="utf-8")) if ruta_indice.exists() else {}
+
+    perfiles: list[str] = []
+    for hoja in range(1, args.hojas + 1):
+        if args.institucion:
+            url = f"{base_url}/institucion/{args.institucion}/funcionarios?sheet={hoja}"
+        else:
+            url = f"{base_url}/funcionariospublicos?sheet={hoja}"
+        cuerpo = descargar(sesion, url, FIXTURES / "listados", indice)
+        for href in html.fromstring(cuerpo).xpath(_TARJETAS):
+            if "/institucion/" in href and "/funcionarios/" in href:
+                perfiles.append(urljoin(url, href))
+        time.sleep(args.demora)
+
+    for url in perfiles[: args.perfiles]:
+        descargar(sesion, url, FIXTURES / "perfiles", indice)
+        time.sleep(args.demora)
+
+    ruta_indice.write_text(json.dumps(indice, indent=2, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+    print(f"{len(indice)} fixtures registrados en {ruta_indice}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Extensión de Scrapy que usa `bench_crawl.py` para medir una corrida de `main_scrapy`.
+"""
+import json
+import sys
+import time
+from pathlib import Path
+from scrapy import signals
+
+
+def percentil(valores: list[float], p: float) -> float | None:
+    if not valores:
+        return None
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))]
+
+
+def rss_maximo_mb() -> float | None:
+    """Pico de memoria residente del proceso actual, en MB."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB; macOS, bytes
+    return maximo / (1024 * 1024) if sys.platform == "darwin" else maximo / 1024
+
+
+class MedicionExtension:
+    def __init__(self, ruta: str):
+        self.ruta = Path(ruta)
+        self.latencias = {"listado": [], "perfil": []}
+        self.marcas = {}
+        self.items = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        ext = cls(crawler.settings.get("BENCH_RESULTADO_PATH"))
+        ext.stats = crawler.stats
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.marcas["inicio"] = time.perf_counter()
+        self.cpu_inicio = time.process_time()
+
+    def response_received(self, response, request, spider):
+        etapa = "listado" if "hoja" in request.meta else "perfil"
+        self.latencias[etapa].append(request.meta.get("download_latency", 0.0))
+        self.marcas[f"fin_{etapa}"] = time.perf_counter()
+        self.marcas.setdefault(f"primer_{etapa}", time.perf_counter())
+
+    def item_scraped(self, item, response, spider):
+        self.items += 1
+        self.marcas.setdefault("primer_item", time.perf_counter())
+
+    def spider_closed(self, spider, reason):
+        fin = time.perf_counter()
+        inicio = self.marcas["inicio"]
+        total = fin - inicio
+
+        def desde_inicio(marca):
+            return self.marcas[marca] - inicio if marca in self.marcas else None
+
+        resultado = {
+            "razon_cierre": reason,
+            "items": self.items,
+            "segundos": total,
+            "items_por_segundo": self.items / total if total else None,
+            "cpu_segundos": time.process_time() - self.cpu_inicio,
+            "rss_maximo_mb": rss_maximo_mb(),
+            "reintentos": self.stats.get_value("retry/count", 0),
+            "latencia": {
+                etapa: {
+                    "n": len(valores),
+                    "p50": percentil(valores, 50),
+                    "p99": percentil(valores, 99),
+                }
+                for etapa, valores in self.latencias.items()
+            },
+            "etapas": {
+                "primer_item": desde_inicio("primer_item"),
+                "fin_listado": desde_inicio("fin_listado"),
+                "fin_perfiles": desde_inicio("fin_perfil"),
+            },
+        }
+        self.ruta.write_text(json.dumps(resultado, indent=2), encoding="utf-8")
@@ -0,0 +1,126 @@
+"""
+Servidor HTTP local que imita el directorio de gob.pe para los benchmarks.
+
+Sirve las hojas del listado (`/funcionariospublicos?sheet=N`), los listados por institución
+(`/institucion/<slug>/funcionarios?sheet=N`) y los perfiles de
+`sinteticos.py`, con latencia y tasa de errores configurables. Si se indica una carpeta de
+grabación, los perfiles se sirven desde sus archivos `*.html` (en orden) en lugar de generarse.
+Con `--sin-paginacion` los listados no traen el enlace a la última página y la spider debe
+recorrerlos hoja por hoja hasta encontrar una vacía.
+
+Uso independiente:
+    python benchmarks/servidor.py --hojas 50 --latencia 0.05 --tasa-error 0.01 --puerto 8000
+    python benchmarks/servidor.py --hojas 5 --sin-paginacion
+"""
+import argparse
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from sinteticos import pagina_listado, pagina_listado_institucion, pagina_perfil
+
+_PERFIL = re.compile(r"^/institucion/[^/]+/funcionarios/(\d+)-")
+_LISTADO_INSTITUCION = re.compile(r"^/institucion/([^/]+)/funcionarios/?$")
+
+
+class ServidorDirectorio(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(
+        self,
+        puerto: int = 0,
+        hojas: int = 20,
+        latencia: float = 0.0,
+        tasa_error: float = 0.0,
+        grabacion: Path | None = None,
+        semilla: int = 0,
+        paginacion: bool = True,
+    ):
+        super().__init__(("127.0.0.1", puerto), _Manejador)
+        self.hojas = hojas
+        self.latencia = latencia
+        self.tasa_error = tasa_error
+        self.paginacion = paginacion
+        self.perfiles_grabados = sorted(Path(grabacion).glob("*.html")) if grabacion else []
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def falla(self) -> bool:
+        with self._lock:
+            return self._azar.random() < self.tasa_error
+
+    def perfil(self, i: int) -> bytes:
+        if self.perfiles_grabados:
+            return self.perfiles_grabados[i % len(self.perfiles_grabados)].read_bytes()
+        return pagina_perfil(i).encode("utf-8")
+
+    def iniciar(self) -> "ServidorDirectorio":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    server: ServidorDirectorio
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.server.latencia:
+            time.sleep(self.server.latencia)
+        if self.server.falla():
+            return self._responder(503, b"Servicio no disponible")
+
+        url = urlparse(self.path)
+        hoja = int(parse_qs(url.query).get("sheet", ["1"])[0])
+        if url.path == "/funcionariospublicos":
+            pagina = pagina_listado(hoja, self.server.hojas, paginacion=self.server.paginacion)
+            return self._responder(200, pagina.encode("utf-8"))
+        institucion = _LISTADO_INSTITUCION.match(url.path)
+        if institucion:
+            pagina = pagina_listado_institucion(
+                institucion.group(1), hoja, self.server.hojas, paginacion=self.server.paginacion
+            )
+            return self._responder(200, pagina.encode("utf-8"))
+        perfil = _PERFIL.match(url.path)
+        if perfil:
+            return self._responder(200, self.server.perfil(int(perfil.group(1))))
+        self._responder(404, b"No encontrado")
+
+    def _responder(self, estado: int, cuerpo: bytes):
+        self.send_response(estado)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--hojas", type=int, default=20)
+    parser.add_argument("--latencia", type=float, default=0.0, help="segundos por respuesta")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="fracción de respuestas 503")
+    parser.add_argument("--grabacion", type=Path, help="carpeta con perfiles HTML grabados")
+    parser.add_argument("--sin-paginacion", action="store_true", help="listados sin enlace a la última página")
+    args = parser.parse_args()
+
+    servidor = ServidorDirectorio(
+        args.puerto, args.hojas, args.latencia, args.tasa_error, args.grabacion, paginacion=not args.sin_paginacion
+    )
+    print(f"Sirviendo {args.hojas} hojas en {servidor.base_url}")
+    servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Páginas sintéticas con la misma estructura que el directorio de gob.pe, para los benchmarks
+que no deben depender del sitio real.
+"""
+import random
+
+MESES = ["ene", "feb", "mar", "abr", "may", "jun", "jul", "ago", "set", "oct", "nov", "dic"]
+INSTITUCIONES = [
+    "ceplan", "minsa", "minedu", "mef", "produce", "sunat", "reniec", "midis", "mtc", "minam",
+]
+CARGOS = ["Jefe de Oficina", "Director General", "Gerente", "Subgerente", "Asesor", "Coordinador"]
+
+# Navegación y pie de página que acompañan a cada página real y que los XPath deben recorrer
+_RELLENO = "".join(
+    f'<li class="menu-item"><a class="text-base" href="/enlace/{i}">Enlace {i}</a></li>'
+    for i in range(150)
+)
+
+
+def slug_institucion(i: int) -> str:
+    return INSTITUCIONES[i % len(INSTITUCIONES)]
+
+
+def cargo_funcionario(i: int) -> str:
+    """Cargo del funcionario `i` (el mismo en su tarjeta del listado y en su perfil)."""
+    return CARGOS[i % len(CARGOS)]
+
+
+def url_perfil(i: int) -> str:
+    return f"/institucion/{slug_institucion(i)}/funcionarios/{i}-funcionario-{i}"
+
+
+def pagina_perfil(i: int) -> str:
+    """HTML de un perfil de funcionario."""
+    rnd = random.Random(i)
+    fecha = f"{rnd.randint(1, 28):02d} {rnd.choice(MESES)} {rnd.randint(2015, 2025)}"
+    resumen = "".join(
+        f"<p>Párrafo {j} del funcionario {i}:\xa0experiencia en gestión pública.</p>\n"
+        for j in range(rnd.randint(1, 8))
+    )
+    return f"""<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>Funcionario {i}</title></head>
+<body><header><nav><ul>{_RELLENO}</ul></nav></header>
+<main><div class="container">
+  <h2 class="text-base leading-6"><a href="/institucion/{slug_institucion(i)}">Institución {slug_institucion(i).upper()}</a></h2>
+  <h1 class="text-2xl leading-8">Funcionario Número {i}</h1>
+  <div class="mt-2">{cargo_funcionario(i)}</div>
+  <div class="mt-4"><span class="icon-calendar"></span><span class="ml-1">{fecha}</span></div>
+  <div class="mt-4"><span>funcionario{i}@{slug_institucion(i)}.gob.pe</span></div>
+  <div class="mt-4"><a class="icon-text" href="tel:01{i:07d}" aria-label="Llamar al número 01{i:07d}">(01) {i % 1000:03d}-{i % 10000:04d}</a></div>
+  <div class="mt-3 font-bold"><div> Resolución Ministerial N° {i}-{rnd.randint(2015, 2025)}-PCM </div></div>
+  <div id="biography-showhide"><div class="leading-6">{resumen}</div></div>
+</div></main>
+<footer><ul>{_RELLENO}</ul></footer></body></html>"""
+
+
+def tarjeta_listado(i: int) -> str:
+    return (
+        '<a class="link-transition flex hover:no-underline justify-between items-center mt-8" '
+        f'href="{url_perfil(i)}"><div><h3 class="font-bold">Funcionario Número {i}</h3>'
+        f'<p class="text-sm">{cargo_funcionario(i)}</p>'
+        f'<p class="text-sm">Institución {slug_institucion(i).upper()}</p></div></a>'
+    )
+
+
+def _pagina_tarjetas(ids: list[int], total_hojas: int, paginacion: bool = True) -> str:
+    tarjetas = "".join(tarjeta_listado(i) for i in ids)
+    # Sin `paginacion` se omite el enlace a la última página, como en los listados de una sola hoja
+    enlace = (
+        f'<nav class="pagination"><a aria-label="Última página" href="?sheet={total_hojas}">{total_hojas}</a></nav>'
+        if paginacion
+        else ""
+    )
+    return f"""<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>Funcionarios públicos</title></head>
+<body><header><nav><ul>{_RELLENO}</ul></nav></header>
+<main>{tarjetas}
+{enlace}
+</main></body></html>"""
+
+
+def pagina_listado(hoja: int, total_hojas: int, por_hoja: int = 20, paginacion: bool = True) -> str:
+    """HTML de una hoja del listado general (`/funcionariospublicos?sheet=N`)."""
+    ids = []
+    if 1 <= hoja <= total_hojas:
+        inicio = (hoja - 1) * por_hoja
+        ids = list(range(inicio, inicio + por_hoja))
+    return _pagina_tarjetas(ids, total_hojas, paginacion)
+
+
+def pagina_listado_institucion(
+    slug: str, hoja: int, total_hojas: int, por_hoja: int = 20, paginacion: bool = True
+) -> str:
+    """
+    HTML de una hoja del listado de una institución (`/institucion/<slug>/funcionarios?sheet=N`),
+    con los funcionarios de esa institución entre los `total_hojas * por_hoja` del directorio.
+    """
+    ids = [i for i in range(total_hojas * por_hoja) if slug_institucion(i) == slug]
+    hojas_institucion = max(1, -(-len(ids) // por_hoja))
+    pagina = ids[(hoja - 1) * por_hoja : hoja * por_hoja] if hoja >= 1 else []
+    return _pagina_tarjetas(pagina, hojas_institucion, paginacion)
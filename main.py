@@ -7,5 +7,5 @@ if __name__ == "__main__":
     date_formatted = date.strftime("%Y%m%d")
     output_path = Path(__file__).parent / "funcionarios" / f"funcionarios_publicos_{date_formatted}.csv"
 
-    main_scrapy(output_path)
+    main_scrapy(output_path, incremental=True)
 